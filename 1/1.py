@@ -1,4 +1,14 @@
-from typing import List, Dict, Tuple
+import json
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Iterable, Iterator, Optional
+
+import numpy as np
+
+from matcher import compile_lut
 
 INPUT_FILE = 'input.txt'
 
@@ -29,7 +39,39 @@ SPELLED_DIGITS = {
 DEFAULT_LUT = {**CHAR_DIGITS, **SPELLED_DIGITS}
 
 
+def load_lut(*paths: str) -> Dict[str, int]:
+    """
+    Loads extra digit vocabulary (other languages, ordinals, ...) from UTF-8 files with one
+    "word value" pair per line. Blank lines and lines starting with # are skipped. Later files win.
+    """
+    lut: Dict[str, int] = {}
+
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for n, line in enumerate(f, 1):
+                line = line.strip()
+
+                if not line or line.startswith('#'):
+                    continue
+
+                parts = line.rsplit(None, 1)
+
+                if len(parts) != 2 or not parts[1].isdigit():
+                    raise Exception(f'{path}:{n}: expected "word value", got {line!r}')
+
+                lut[parts[0]] = int(parts[1])
+
+    return lut
+
+
 def extract_digits(l: str, lut: Dict[str, int]) -> Tuple[int, int]:
+    return compile_lut(lut).first_last(l)
+
+
+def extract_digits_naive(l: str, lut: Dict[str, int]) -> Tuple[int, int]:
+    """
+    Original implementation, tests every LUT key at every position. Kept as a baseline for bench.py.
+    """
     first: int = -1
     last: int = -1
 
@@ -55,24 +97,232 @@ def extract_digits(l: str, lut: Dict[str, int]) -> Tuple[int, int]:
     return first, last
 
 
-def main():
-    # Read the file
+def combine_digits(first: int, last: int) -> int:
+    return (first * 10) + last
+
+
+def calibration_value(line: str, lut: Dict[str, int]) -> int:
+    return combine_digits(*extract_digits(line, lut))
+
+
+def iter_calibrations(lines: Iterable[str], lut: Dict[str, int]) -> Iterator[Tuple[str, int, int]]:
+    """
+    Yields (line, first, last) for each line, without reading ahead.
+    """
+    for line in lines:
+        first, last = extract_digits(line, lut)
+        yield line, first, last
+
+
+class RunningTotal:
+    total: int
+    num_lines: int
+
+    def __init__(self, total: int = 0, num_lines: int = 0):
+        self.total = total
+        self.num_lines = num_lines
+
+    def consume(self, lines: Iterable[str], lut: Dict[str, int]) -> Iterator[Tuple[str, int, int]]:
+        """
+        Like iter_calibrations, but keeps the running total up to date as lines go by.
+        """
+        for line, first, last in iter_calibrations(lines, lut):
+            self.total += combine_digits(first, last)
+            self.num_lines += 1
+            yield line, first, last
+
+
+def follow(path: str, lut: Dict[str, int], state_path: Optional[str] = None) -> RunningTotal:
+    """
+    Processes only what has been appended to path since the last call, picking up the byte offset and
+    running total saved in state_path (path + '.state' by default). A partial last line is left for the
+    next call. If the file shrank or was replaced, it starts over from the beginning.
+    """
+    state_path = state_path or path + '.state'
+
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = None
+
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+
+        if state is None or state['inode'] != st.st_ino or state['offset'] > st.st_size:
+            state = {'inode': st.st_ino, 'offset': 0, 'total': 0, 'num_lines': 0}
+
+        f.seek(state['offset'])
+        appended = f.read()
+
+    # only complete lines. the rest gets picked up once its newline has been written
+    complete = appended[:appended.rfind(b'\n') + 1]
+
+    running = RunningTotal(state['total'], state['num_lines'])
+    for _ in running.consume(complete.decode('utf-8').splitlines(keepends=True), lut):
+        pass
+
+    state.update(offset=state['offset'] + len(complete), total=running.total, num_lines=running.num_lines)
+
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+    return running
+
+
+def sum_char_digits(buf: bytes) -> int:
+    """
+    Fast path for CHAR_DIGITS: no words to match, so the whole buffer is handled as a byte array. Each
+    digit gets the index of the line it's on (the number of newlines before it). A line's first digit is
+    the one whose line index differs from the previous digit's, and its last digit is the one whose line
+    index differs from the next digit's.
+
+    Same result as summing calibration_value(line, CHAR_DIGITS) over every line. That includes lines
+    without any digits: extract_digits reports -1 for both digits of such a line, so calibration_value
+    gives it 10 * -1 + -1 = -11, and so does this. Real puzzle input always has a digit on every line.
+    """
+    data = np.frombuffer(buf, dtype=np.uint8)
+
+    if len(data) == 0:
+        return 0
+
+    newlines = data == ord('\n')
+    num_lines = int(newlines.sum()) + (0 if newlines[-1] else 1)
+
+    positions = np.flatnonzero((data >= ord('1')) & (data <= ord('9')))
+    digits = data[positions].astype(np.int64) - ord('0')
+    lines = np.cumsum(newlines)[positions]
+
+    is_first = np.ones(len(positions), dtype=bool)
+    is_first[1:] = lines[1:] != lines[:-1]
+    is_last = np.ones(len(positions), dtype=bool)
+    is_last[:-1] = lines[1:] != lines[:-1]
+
+    lines_without_digits = num_lines - int(is_first.sum())
+
+    return int(10 * digits[is_first].sum() + digits[is_last].sum()) - 11 * lines_without_digits
+
+
+def is_char_digits(lut: Dict[str, int]) -> bool:
+    return lut is CHAR_DIGITS or lut == CHAR_DIGITS
+
+
+def chunk_boundaries(mm: mmap.mmap, num_chunks: int) -> List[Tuple[int, int]]:
+    """
+    Splits the file into about num_chunks (start, end) byte ranges. Each boundary is moved forward to just
+    past the next newline, so no line is split between chunks.
+    """
+    size = len(mm)
+    boundaries = [0]
+
+    for i in range(1, num_chunks):
+        pos = max(boundaries[-1], size * i // num_chunks)
+        newline = mm.find(b'\n', pos)
+        boundaries.append(size if newline == -1 else newline + 1)
+
+    boundaries.append(size)
+
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+
+def sum_chunk(path: str, start: int, end: int, lut: Dict[str, int]) -> int:
+    """
+    Sums calibration values for the lines in [start, end). Runs in a worker process, which maps the file
+    itself so only the offsets have to be sent over.
+    """
     total = 0
 
-    with open(INPUT_FILE) as f:
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if is_char_digits(lut):
+            return sum_char_digits(mm[start:end])
+
+        pos = start
+
+        while pos < end:
+            newline = mm.find(b'\n', pos, end)
+            line_end = end if newline == -1 else newline + 1
+
+            total += calibration_value(mm[pos:line_end].decode('utf-8'), lut)
+            pos = line_end
+
+    return total
+
+
+def sum_file_parallel(path: str, lut: Dict[str, int], workers: int = None) -> int:
+    """
+    Memory-maps the file, splits it into newline-aligned chunks and sums each chunk in a separate process.
+    Prints throughput when done.
+    """
+    workers = workers or os.cpu_count()
+    start_time = time.perf_counter()
+
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+
+        if size == 0:
+            return 0
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # chunks are equal byte ranges, but first_last stops as soon as it hits a digit from either
+            # end, so a chunk's cost depends on where its digits sit. split 4x finer than the worker count
+            # and let idle workers pick up the rest
+            chunks = chunk_boundaries(mm, workers * 4)
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(sum_chunk, path, start, end, lut) for start, end in chunks]
+        total = sum(future.result() for future in futures)
+
+    elapsed = time.perf_counter() - start_time
+    print(f'{size / 1e6:.1f} MB in {elapsed:.2f}s ({size / 1e6 / elapsed:.1f} MB/s, {len(chunks)} chunks, {workers} workers)')
+
+    return total
+
+
+def main():
+    # pass --lut FILE to add vocabulary on top of DEFAULT_LUT
+    lut = DEFAULT_LUT
+    if '--lut' in sys.argv:
+        lut = {**DEFAULT_LUT, **load_lut(sys.argv[sys.argv.index('--lut') + 1])}
+
+    # pass --parallel [workers] for large files. lines aren't echoed in this mode
+    if '--parallel' in sys.argv:
+        i = sys.argv.index('--parallel')
+        workers = int(sys.argv[i + 1]) if len(sys.argv) > i + 1 and sys.argv[i + 1].isdigit() else None
+        print(sum_file_parallel(INPUT_FILE, lut, workers))
+        return
+
+    # pass --follow [seconds] to only process lines appended since the last run. with an interval it
+    # keeps polling for new lines, like tail -f
+    if '--follow' in sys.argv:
+        i = sys.argv.index('--follow')
+        has_interval = len(sys.argv) > i + 1 and sys.argv[i + 1].replace('.', '', 1).isdigit()
+        interval = float(sys.argv[i + 1]) if has_interval else None
+
         while True:
-            line = f.readline()
+            running = follow(INPUT_FILE, lut)
+            print(f'{running.num_lines} lines, total = {running.total}')
 
-            if not line:
-                break
+            if interval is None:
+                return
 
-            first, last = extract_digits(line, DEFAULT_LUT)
+            time.sleep(interval)
 
-            print(line, first, last)
+    # pass --part1 to only sum the numeric digits, using the vectorized fast path
+    if '--part1' in sys.argv:
+        with open(INPUT_FILE, 'rb') as f:
+            print("part 1 =", sum_char_digits(f.read()))
+        return
 
-            total += (first * 10) + last
+    # Read the file
+    running = RunningTotal()
+
+    with open(INPUT_FILE) as f:
+        for line, first, last in running.consume(f, lut):
+            print(line, first, last)
 
-    print(total)
+    print(running.total)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,63 @@
+"""
+Compares extract_digits against the original per-position scan on long generated lines.
+
+python bench.py [line length] [number of lines]
+"""
+import importlib.util
+import os
+import random
+import sys
+import time
+
+spec = importlib.util.spec_from_file_location('day1', os.path.join(os.path.dirname(os.path.abspath(__file__)), '1.py'))
+day1 = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(day1)
+
+FILLER = 'abcdfghjklmpqruvwxyz'
+
+# chance of any position holding a digit / spelled digit
+DENSITIES = {
+    'sparse': 0.0,
+    'dense': 0.02,
+}
+
+
+def generate_line(length: int, density: float, rng: random.Random) -> str:
+    """
+    Filler letters with digits and spelled digits mixed in at the given density. There's always a word
+    in the middle of the line, so sparse lines have to be scanned halfway from either end.
+    """
+    words = list(day1.DEFAULT_LUT.keys())
+    parts = [rng.choice(words) if rng.random() < density else rng.choice(FILLER) for _ in range(length)]
+    parts[length // 2] = rng.choice(words)
+
+    return ''.join(parts) + '\n'
+
+
+def timed(fn, lines) -> tuple[float, list[tuple[int, int]]]:
+    start = time.perf_counter()
+    results = [fn(line, day1.DEFAULT_LUT) for line in lines]
+    return time.perf_counter() - start, results
+
+
+def main():
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    rng = random.Random(1)
+
+    for name, density in DENSITIES.items():
+        lines = [generate_line(length, density, rng) for _ in range(count)]
+
+        naive_time, naive_results = timed(day1.extract_digits_naive, lines)
+        matcher_time, matcher_results = timed(day1.extract_digits, lines)
+
+        assert naive_results == matcher_results, "results differ"
+
+        print(f'{name}: {count} lines x {length} chars')
+        print(f'  naive:   {naive_time:.3f}s')
+        print(f'  matcher: {matcher_time:.3f}s ({naive_time / matcher_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+# Above this many (nodes x alphabet) entries the automaton keeps only trie edges plus suffix links
+# instead of a full transition table. Large multilingual vocabularies would otherwise need hundreds of
+# MB for transitions that mostly lead back to shallow nodes.
+DENSE_TRANSITION_LIMIT = 1_000_000
+
+
+class Automaton:
+    """
+    Aho-Corasick automaton over a set of keys.
+
+    Small LUTs are compiled to a full transition table (node -> char -> node), so scanning is one dict
+    lookup per character. Large ones keep only the trie edges and follow suffix links on a miss, which is
+    still linear overall. Either way matching cost doesn't depend on how many keys there are.
+    """
+    # transitions[node][char] -> next node. complete for the alphabet when dense, trie edges otherwise
+    transitions: List[Dict[str, int]]
+    # suffix link for each node. all 0 when dense, since the table already accounts for them
+    fail: List[int]
+    # longest key ending at each node (following suffix links), as (length, value)
+    longest_match: List[Optional[Tuple[int, int]]]
+    max_len: int
+
+    def __init__(self, lut: Dict[str, int]):
+        children: List[Dict[str, int]] = [{}]
+        terminal: List[Optional[Tuple[int, int]]] = [None]
+
+        # Build the trie
+        for key, value in lut.items():
+            if not key:
+                raise Exception('LUT keys must be non-empty')
+
+            node = 0
+
+            for c in key:
+                if c not in children[node]:
+                    children[node][c] = len(children)
+                    children.append({})
+                    terminal.append(None)
+                node = children[node][c]
+
+            terminal[node] = (len(key), value)
+
+        alphabet = {c for key in lut for c in key}
+        dense = len(children) * len(alphabet) <= DENSE_TRANSITION_LIMIT
+        fail = [0] * len(children)
+
+        self.max_len = max((len(key) for key in lut), default=0)
+        self.longest_match = list(terminal)
+        self.transitions = [{} for _ in children] if dense else children
+
+        # BFS so a node's suffix link is always finished before the node itself
+        queue = list(children[0].values())
+
+        if dense:
+            for c in alphabet:
+                self.transitions[0][c] = children[0].get(c, 0)
+
+        i = 0
+        while i < len(queue):
+            node = queue[i]
+            i += 1
+
+            if self.longest_match[node] is None:
+                self.longest_match[node] = self.longest_match[fail[node]]
+
+            if dense:
+                for c in alphabet:
+                    child = children[node].get(c)
+
+                    if child is not None:
+                        fail[child] = self.transitions[fail[node]][c]
+                        self.transitions[node][c] = child
+                        queue.append(child)
+                    else:
+                        self.transitions[node][c] = self.transitions[fail[node]][c]
+            else:
+                for c, child in children[node].items():
+                    fail[child] = self._step(fail, fail[node], c) if node else 0
+                    queue.append(child)
+
+        self.fail = fail if not dense else [0] * len(children)
+
+    def _step(self, fail: List[int], node: int, c: str) -> int:
+        while True:
+            nxt = self.transitions[node].get(c)
+
+            if nxt is not None:
+                return nxt
+            elif node == 0:
+                return 0
+
+            node = fail[node]
+
+    def earliest(self, chars: Iterable[str]) -> int:
+        """
+        Value of the earliest-starting key in chars, or -1 if there's no match. If several keys start
+        there, the longest one wins.
+
+        Stops as soon as no later match could start before the best one found, so the cost depends on
+        where the match is rather than on how long the input is.
+        """
+        transitions = self.transitions
+        fail = self.fail
+        longest_match = self.longest_match
+
+        first = -1
+        first_start = None
+        node = 0
+
+        for i, c in enumerate(chars):
+            if first_start is not None and i - self.max_len + 1 > first_start:
+                break
+
+            # follow suffix links until some node has an edge for c (only ever loops in sparse mode)
+            while True:
+                nxt = transitions[node].get(c)
+
+                if nxt is not None:
+                    node = nxt
+                    break
+                elif node == 0:
+                    break
+
+                node = fail[node]
+
+            match = longest_match[node]
+
+            if match is not None:
+                length, value = match
+                start = i - length + 1
+
+                # a later match with the same start is longer, and the longest key wins (e.g. "sixty" over "six")
+                if first_start is None or start <= first_start:
+                    first, first_start = value, start
+
+        return first
+
+
+class DigitMatcher:
+    """
+    Finds the first and last digit in a line, including overlapping words like "oneight" (1, 8).
+
+    The first digit comes from scanning forward with an automaton over the LUT keys. The last digit comes
+    from scanning the line backwards with an automaton over the reversed keys: the earliest match in
+    the reversed line is the latest-ending match in the line itself.
+    """
+    forward: Automaton
+    reverse: Automaton
+
+    def __init__(self, lut: Dict[str, int]):
+        self.forward = Automaton(lut)
+        self.reverse = Automaton({key[::-1]: value for key, value in lut.items()})
+
+    def first(self, line: str) -> int:
+        return self.forward.earliest(line)
+
+    def last(self, line: str) -> int:
+        return self.reverse.earliest(reversed(line))
+
+    def first_last(self, line: str) -> Tuple[int, int]:
+        """
+        :return: value of the earliest-starting key and of the latest-ending key, or -1 if there's no match
+        """
+        return self.first(line), self.last(line)
+
+
+# Compiled matchers, so the automaton is built once per LUT rather than once per line. LUTs are looked
+# up by identity first, which is O(1) no matter how big the LUT is, then by content so separately built
+# but equal LUTs share a matcher.
+MAX_CACHED_MATCHERS = 32
+_BY_ID: 'OrderedDict[int, Tuple[Dict[str, int], int, DigitMatcher]]' = OrderedDict()
+_BY_CONTENT: 'OrderedDict[FrozenSet[Tuple[str, int]], DigitMatcher]' = OrderedDict()
+
+
+def _remember(cache: OrderedDict, key, value):
+    cache[key] = value
+    cache.move_to_end(key)
+
+    while len(cache) > MAX_CACHED_MATCHERS:
+        cache.popitem(last=False)
+
+
+def compile_lut(lut: Dict[str, int]) -> DigitMatcher:
+    """
+    Returns the compiled matcher for lut, building it if needed.
+
+    A LUT that's edited in place without changing its size isn't noticed by the identity lookup; call
+    clear_matcher_cache() after doing that.
+    """
+    cached = _BY_ID.get(id(lut))
+
+    # the cache holds a reference to the LUT, so its id can't have been reused by another dict
+    if cached is not None and cached[0] is lut and cached[1] == len(lut):
+        _BY_ID.move_to_end(id(lut))
+        return cached[2]
+
+    key = frozenset(lut.items())
+    matcher = _BY_CONTENT.get(key)
+
+    if matcher is None:
+        matcher = DigitMatcher(lut)
+
+    _remember(_BY_CONTENT, key, matcher)
+    _remember(_BY_ID, id(lut), (lut, len(lut), matcher))
+
+    return matcher
+
+
+def clear_matcher_cache():
+    _BY_ID.clear()
+    _BY_CONTENT.clear()
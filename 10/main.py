@@ -1,7 +1,11 @@
 import os
+import sys
 from typing import List, Tuple, Set, Dict, Literal, Union, Optional, Callable
 from termcolor import colored
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.render import render_grid, write_once
+
 os.system('color')
 
 EXAMPLES = [x.strip() for x in [
@@ -399,7 +403,29 @@ class Grid:
         )
 
 
-def solve(grid: str) -> int:
+def render_solution(grid: Grid, loop_cells: Set[GridCell], p1: Set[GridCell], p2: Set[GridCell], inside_cells: Set[GridCell]) -> str:
+    def render_cell(cell: GridCell) -> str:
+        if cell in loop_cells:
+            if cell.is_start:
+                return colored('S', 'white', 'on_green', ['bold'])
+            else:
+                color = ['red', 'green', 'blue', 'yellow'][cell.turn_number % 4]
+                return colored(CONNECTOR_SYMBOLS[cell.connector_type], color)
+        elif cell in p1 and cell in p2:
+            return colored('*', 'magenta', 'on_white')
+        elif cell in inside_cells:
+            return colored('@', 'white', 'on_red', ['bold'])
+        elif cell in p1:
+            return colored('*', 'blue')
+        elif cell in p2:
+            return colored('*', 'red')
+        else:
+            return '.'
+
+    return render_grid(grid.cells, render_cell)
+
+
+def solve(grid: str, render: bool = False, render_path: Optional[str] = None) -> int:
     grid = Grid(grid)
     visited, max_distance = grid.breadth_first_traverse(grid.start)
 
@@ -454,44 +480,35 @@ def solve(grid: str) -> int:
 
     loop_cells = visit_batches[0]
 
-    for y, line in enumerate(grid.cells):
-        for x, cell in enumerate(line):
-            if cell in loop_cells:
-                if cell.is_start:
-                    print(colored('S', 'white', 'on_green', ['bold']), end='')
-                else:
-                    color = ['red', 'green', 'blue', 'yellow'][cell.turn_number % 4]
-                    print(colored(CONNECTOR_SYMBOLS[cell.connector_type], color), end='')
-            elif cell in p1 and cell in p2:
-                print(colored('*', 'magenta', 'on_white'), end='')
-            elif cell in inside_cells:
-                print(colored('@', 'white', 'on_red', ['bold']), end='')
-            elif cell in p1:
-                print(colored('*', 'blue'), end='')
-            elif cell in p2:
-                print(colored('*', 'red'), end='')
-            else:
-                print('.', end='')
-        print()
-
-    print()
-    print()
+    if render:
+        write_once(render_solution(grid, loop_cells, p1, p2, inside_cells) + '\n\n', render_path)
 
     print("Max distance in path: {}".format(max_distance))
     print("Total inside cells: {}".format(num_inside_cells))
 
+    return num_inside_cells
+
 
 def main():
     input = open('input.txt').read().strip()
 
+    # pass --render [PATH] to draw the loop and the inside/outside partitions. with a path, the drawing for
+    # input.txt is written there instead of to stdout
+    render = '--render' in sys.argv
+    render_path = None
+
+    if render:
+        i = sys.argv.index('--render')
+        render_path = sys.argv[i + 1] if len(sys.argv) > i + 1 and not sys.argv[i + 1].startswith('--') else None
+
     # solve(EXAMPLES[5])
 
     for i in EXAMPLES:
         print("Example:")
-        solve(i.strip())
+        solve(i.strip(), render)
         print()
 
-    solve(input)
+    solve(input, render, render_path)
 
 
 if __name__ == '__main__':
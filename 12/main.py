@@ -1,4 +1,9 @@
-from typing import Tuple, List, Dict
+import os
+import sys
+from typing import Tuple, List, Dict, Optional
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.budget import Budget
 
 EXAMPLE1 = """
 ?###???????? 3,2,1
@@ -58,8 +63,13 @@ def solve_count(row: str, run_lengths: List[int], dt: Dict[Tuple[chr, int, int],
     dt[key] = r
     return r
 
-def solve(row: str, run_lengths: List[int]) -> List[str]:
-    if len(row) == 0 and len(run_lengths) == 0:
+def solve(row: str, run_lengths: List[int], budget: Optional[Budget] = None) -> List[str]:
+    """
+    Enumerates every arrangement. If budget runs out, the arrangements found so far are returned.
+    """
+    if budget and budget.exhausted():
+        return []
+    elif len(row) == 0 and len(run_lengths) == 0:
         return ['']
     elif len(run_lengths) == 0:
         return [''] if '#' not in row else []
@@ -67,7 +77,7 @@ def solve(row: str, run_lengths: List[int]) -> List[str]:
         return []
 
     if row[0] == '.':
-        return ['.' + x for x in solve(row[1:], run_lengths)]
+        return ['.' + x for x in solve(row[1:], run_lengths, budget)]
     elif row[0] == '#':
         n = run_lengths[0]
 
@@ -79,15 +89,15 @@ def solve(row: str, run_lengths: List[int]) -> List[str]:
 
         if run_fits and run_stops:
             if len(row) == n:
-                return [('#' * n) + x for x in solve('', run_lengths[1:])]
+                return [('#' * n) + x for x in solve('', run_lengths[1:], budget)]
             else:
-                return [('#' * n) + '.' + x for x in solve(row[n+1:], run_lengths[1:])]
+                return [('#' * n) + '.' + x for x in solve(row[n+1:], run_lengths[1:], budget)]
         else:
             return []
     else:
         return (
-            solve('#' + row[1:], run_lengths) +
-            solve('.' + row[1:], run_lengths)
+            solve('#' + row[1:], run_lengths, budget) +
+            solve('.' + row[1:], run_lengths, budget)
         )
 
 
@@ -103,5 +113,39 @@ def run(input: str, expansion: int = 1):
     print(total)
 
 
+def run_enumerated(input: str, expansion: int, budget: Budget) -> int:
+    """
+    Same count as run, but by listing every arrangement with solve, so it can be cut short by budget.
+    If it is, the count is a lower bound and budget.progress says how many rows were finished.
+    """
+    total = 0
+    lines = input.split('\n')
+
+    for i, l in enumerate(lines):
+        row, run_lengths = parse_line(l)
+
+        expanded_row = '?'.join([row] * expansion)
+        total += len(solve(expanded_row, run_lengths*expansion, budget))
+
+        if budget.stopped:
+            break
+
+        budget.progress['rows'] = f'{i + 1}/{len(lines)}'
+
+    return total
+
+
 if __name__ == '__main__':
-    run(open('input.txt').read().strip(), 5)
\ No newline at end of file
+    input = open('input.txt').read().strip()
+
+    # pass --budget SECONDS to enumerate the arrangements instead of counting them. when the budget runs
+    # out (or on Ctrl+C) the count so far is printed along with how many rows were done
+    if '--budget' in sys.argv:
+        budget = Budget(float(sys.argv[sys.argv.index('--budget') + 1]))
+
+        with budget.cancel_on_interrupt():
+            total = run_enumerated(input, 5, budget)
+
+        print(budget.result(total))
+    else:
+        run(input, 5)
\ No newline at end of file
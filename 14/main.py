@@ -1,4 +1,9 @@
-from typing import List
+import os
+import sys
+from typing import List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.checkpoint import Checkpointer
 
 EXAMPLES = [x.strip().split("\n") for x in [
 """
@@ -60,11 +65,23 @@ def cycle_once(grid: List[str]) -> List[str]:
         grid = rotate(grid)
     return grid
 
-def cycle(grid: List[str], times: int = 1) -> List[str]:
+def cycle(grid: List[str], times: int = 1, checkpointer: Optional[Checkpointer] = None) -> List[str]:
     state_map = {}
     current_state = compress_state(grid)
+    start = 0
+
+    if checkpointer:
+        saved = checkpointer.load()
+
+        if saved:
+            start, grid, state_map = saved['n'], saved['grid'], saved['state_map']
+            current_state = compress_state(grid)
+            print(f'resuming from checkpoint at cycle {start}')
+
+    for n in range(start, times):
+        if checkpointer and checkpointer.due():
+            checkpointer.save({'n': n, 'grid': grid, 'state_map': state_map})
 
-    for n in range(times):
         if current_state in state_map:
             state, n_loc = state_map[current_state]
             cycle_length = n - n_loc
@@ -88,15 +105,23 @@ def calculate_score(grid: List[str]) -> int:
 def solve1(grid: List[str]) -> int:
     return calculate_score(slide_rocks_north(grid))
 
-def solve2(grid: List[str]) -> int:
-    return calculate_score(cycle(grid, 1_000_000_000))
+def solve2(grid: List[str], checkpointer: Optional[Checkpointer] = None) -> int:
+    return calculate_score(cycle(grid, 1_000_000_000, checkpointer))
 
 def main():
     input = open("input.txt").read().strip().split("\n")
     # input = EXAMPLES[0]
 
+    # pass --checkpoint to periodically save the cycle search so it can be resumed if interrupted
+    checkpointer = None
+    if '--checkpoint' in sys.argv:
+        checkpointer = Checkpointer('part2.ckpt', 'day14-cycle', '\n'.join(input), check_every=16)
+
     print(solve1(input))
-    print(solve2(input))
+    print(solve2(input, checkpointer))
+
+    if checkpointer:
+        checkpointer.clear()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
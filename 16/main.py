@@ -1,4 +1,10 @@
-from typing import Literal, List, Callable, cast
+import os
+import sys
+from multiprocessing import Pool
+from typing import Literal, List, Callable, Optional, cast
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.shm import SharedGrid, SharedGridHandle, attach_grid
 
 MovementSymbols = Literal["-", "|", "/", "\\", '.']
 Direction = Literal["S", "E", "N", "W"]
@@ -116,7 +122,40 @@ def solve1(grid: List[List[MovementSymbols]]) -> int:
     return len(visited)
 
 
-def solve2(grid: List[List[MovementSymbols]]) -> int:
+def edge_starts(grid: List[List[MovementSymbols]]) -> List[tuple[tuple[int, int], Direction]]:
+    starts: List[tuple[tuple[int, int], Direction]] = []
+
+    for x in range(len(grid[0])):
+        starts.append(((x, 0), 'S'))
+        starts.append(((x, len(grid) - 1), 'N'))
+
+    for y in range(len(grid)):
+        starts.append(((0, y), 'E'))
+        starts.append(((len(grid[0]) - 1, y), 'W'))
+
+    return starts
+
+
+# Set in each worker process by init_trace_worker. Tasks only carry a start point and direction.
+WORKER_GRID: Optional[Grid] = None
+
+
+def init_trace_worker(handle: SharedGridHandle):
+    global WORKER_GRID
+    WORKER_GRID = Grid(attach_grid(handle))
+
+
+def trace_count(start: tuple[tuple[int, int], Direction]) -> int:
+    return len(WORKER_GRID.trace(*start))
+
+
+def solve2(grid: List[List[MovementSymbols]], workers: int = 0) -> int:
+    if workers > 1:
+        # Grid lives in shared memory, so fanning out a trace costs the same regardless of grid size
+        with SharedGrid(grid) as shared:
+            with Pool(workers, initializer=init_trace_worker, initargs=(shared.handle,)) as pool:
+                return max(pool.imap_unordered(trace_count, edge_starts(grid), chunksize=8))
+
     g = Grid(grid)
     # Try from every edge
     max_visited = 0
@@ -135,7 +174,8 @@ def solve2(grid: List[List[MovementSymbols]]) -> int:
 
 
 def main():
-    print(solve2(parse_grid(open('input.txt').read().strip())))
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    print(solve2(parse_grid(open('input.txt').read().strip()), workers))
 
 
 if __name__ == '__main__':
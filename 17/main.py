@@ -1,10 +1,15 @@
 import heapq
 import math
+import os
+import sys
 from collections import defaultdict
 from typing import List, Literal
 
 from termcolor import colored
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.render import render_grid, write_once
+
 EXAMPLE1 = """
 2413432311323
 3215453535623
@@ -168,6 +173,15 @@ def solve1(grid: List[List[int]], start: Point, end: Point) -> int:
                         new_directions
                     ))
 
+def render_path(grid: List[List[int]], d: dict[Point, str]) -> str:
+    def render_cell(p: Point) -> str:
+        if p in d:
+            return colored(DIRECTION_POINTERS[d[p]], 'red')
+        else:
+            return str(grid[p[0]][p[1]])
+
+    return render_grid([[(i, j) for j in range(len(row))] for i, row in enumerate(grid)], render_cell)
+
 def main():
     input = open('input.txt').read().strip()
     # input = EXAMPLE1
@@ -176,17 +190,11 @@ def main():
     end = (len(grid) - 1, len(grid[0]) - 1)
     path, directions, cost = solve2(grid, start, end)
     d = dict(zip(path, directions))
-    t = 0
-
-    for i, row in enumerate(grid):
-        for j, col in enumerate(row):
-            if (i, j) in d:
-                print(colored(DIRECTION_POINTERS[d[(i, j)]], 'red'), end='')
-                t += col
-            else:
-                print(col, end='')
-        print()
+    t = sum(grid[i][j] for i, j in d)
 
+    # pass --render to draw the path over the grid
+    if '--render' in sys.argv:
+        write_once(render_path(grid, d))
 
     print(cost, t)
 
@@ -1,7 +1,12 @@
+import os
 import re
+import sys
 from enum import Enum
 from typing import Literal, TypedDict, Optional, Callable, get_args
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.watch import INPUT, Pipeline, PipelineRun, watch
+
 Operation = Enum('Operation', ['LESS_THAN', 'GREATER_THAN', 'PASSTHROUGH'])
 Variable = Literal['x', 'm', 'a', 's']
 
@@ -200,15 +205,8 @@ def get_valid_constraints(workflow: Workflow, workflows: dict[str, Workflow], co
     return valid_constraints
 
 
-def main():
-    input = open('input.txt').read().strip()
-    # input = open('example.txt').read().strip()
-    # input = EXAMPLE
-
-    input_workflows, input_parts = input.split('\n\n')
-
+def parse_workflows(input_workflows: str) -> dict[str, Workflow]:
     workflows: dict[str, Workflow] = {}
-    parts: list[Part] = []
 
     workflows['A'] = {
         'label': 'A',
@@ -223,27 +221,67 @@ def main():
         workflow = parse_workflow(line)
         workflows[workflow['label']] = workflow
 
-    for line in input_parts.split('\n'):
-        part = parse_part(line)
-        parts.append(part)
+    return workflows
+
+
+def parse_parts(input_parts: str) -> list[Part]:
+    return [parse_part(line) for line in input_parts.split('\n')]
 
+
+def solve1(workflows: dict[str, Workflow], parts: list[Part]) -> int:
     accepted_parts = find_accepted_parts(workflows['in'], workflows, parts)
 
     # sum all x m a s values for every accepted part
-    answer = sum([
+    return sum([
         sum(part['rankings'].values())
         for part in accepted_parts
     ])
 
-    print("part 1 =", answer)
 
+def solve2(workflows: dict[str, Workflow]) -> int:
     valid_constraints = get_valid_constraints(workflows['in'], workflows, Constraints())
-    answer = sum([
+    return sum([
         constraints.total_valid_parts()
         for constraints in valid_constraints
     ])
 
-    print("part 2 =", answer)
+
+def build_pipeline() -> Pipeline:
+    # workflows and parts are hashed separately, so editing parts doesn't recompile the workflows (or
+    # recompute part 2, which only depends on them)
+    return (
+        Pipeline()
+        .stage('workflows text', lambda input: input.split('\n\n')[0], INPUT)
+        .stage('parts text', lambda input: input.split('\n\n')[1], INPUT)
+        .stage('workflows', parse_workflows, 'workflows text')
+        .stage('parts', parse_parts, 'parts text')
+        .stage('part 1', solve1, 'workflows', 'parts')
+        .stage('part 2', solve2, 'workflows')
+    )
+
+
+def report(run: PipelineRun):
+    print("part 1 =", run.values['part 1'])
+    print("part 2 =", run.values['part 2'])
+
+
+def main():
+    # pass --watch to keep the compiled workflows in memory and re-solve whenever input.txt changes
+    if '--watch' in sys.argv:
+        watch('input.txt', build_pipeline(), report)
+        return
+
+    input = open('input.txt').read().strip()
+    # input = open('example.txt').read().strip()
+    # input = EXAMPLE
+
+    input_workflows, input_parts = input.split('\n\n')
+
+    workflows = parse_workflows(input_workflows)
+    parts = parse_parts(input_parts)
+
+    print("part 1 =", solve1(workflows, parts))
+    print("part 2 =", solve2(workflows))
 
 
 if __name__ == '__main__':
@@ -1,4 +1,8 @@
-from typing import List
+import re
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
 
 POSSILBE_GAME_FILTER = {
     'red': lambda x: x <= 12,
@@ -6,10 +10,65 @@ POSSILBE_GAME_FILTER = {
     'blue': lambda x: x <= 14
 }
 
+COLORS = ['red', 'green', 'blue']
+POSSIBLE_GAME_LIMITS = np.array([12, 13, 14])
+
+# limit for colors that POSSIBLE_GAME_LIMITS doesn't mention
+UNCONSTRAINED = np.iinfo(np.int64).max
+
+# Either a game header, a single "N color" count, or the ; between draws
+LOG_TOKEN = re.compile(r'Game (\d+)|(\d+) (\w+)|(;)')
+
+class ColorVocabulary:
+    """
+    Interns color names to small ids, in the order they're first seen. COLORS are always interned first,
+    so their ids are their index in COLORS and line up with POSSIBLE_GAME_LIMITS.
+    """
+    names: List[str]
+    ids: Dict[str, int]
+
+    def __init__(self, names: Iterable[str] = COLORS):
+        self.names = []
+        self.ids = {}
+
+        for name in names:
+            self.intern(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, name: str) -> int:
+        color_id = self.ids.get(name)
+
+        if color_id is None:
+            color_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+
+        return color_id
+
+    def intern_many(self, names: np.ndarray) -> np.ndarray:
+        """
+        Ids for an array of names. Only does one dict lookup per distinct name, so it costs the same
+        whether the log has three colors or dozens.
+        """
+        distinct, first_seen, inverse = np.unique(names, return_index=True, return_inverse=True)
+        distinct_ids = np.zeros(len(distinct), dtype=np.int64)
+
+        for i in np.argsort(first_seen):
+            distinct_ids[i] = self.intern(str(distinct[i]))
+
+        return distinct_ids[inverse.reshape(-1)]
+
+    def limits(self, limits: Dict[str, int]) -> np.ndarray:
+        """
+        :return: limit for each interned color, UNCONSTRAINED for colors not in limits
+        """
+        return np.array([limits.get(name, UNCONSTRAINED) for name in self.names], dtype=np.int64)
+
 # Game will be in format:
 # X1 green, Y1 red, Z1 blue; X2 green, X2 red, X2 blue; ...
 def parse_game(line: str) -> List[List[int]]:
-    max_seen = { 'green': 0, 'red': 0, 'blue': 0 }
+    max_seen = dict.fromkeys(COLORS, 0)
     samples = line.split(';')
 
     for sample in samples:
@@ -19,13 +78,339 @@ def parse_game(line: str) -> List[List[int]]:
             num, color = count.strip().split(' ')
             num = int(num)
 
-            if num > max_seen[color]:
+            if num > max_seen.get(color, 0):
                 max_seen[color] = num
 
     return max_seen
 
+class GameLog:
+    """
+    Every draw of every game. Draws are rows of one (draws x colors) matrix, with game g's draws in rows
+    draw_offsets[g]:draw_offsets[g + 1].
+    """
+    game_ids: np.ndarray
+    # draw_offsets[g] is the first row of game g, draw_offsets[-1] is the number of draws
+    draw_offsets: np.ndarray
+    draws: np.ndarray
+    colors: ColorVocabulary
+
+    def __init__(self, game_ids: np.ndarray, draw_offsets: np.ndarray, draws: np.ndarray, colors: ColorVocabulary):
+        self.game_ids = game_ids
+        self.draw_offsets = draw_offsets
+        self.draws = draws
+        self.colors = colors
+
+    def max_seen(self) -> np.ndarray:
+        """
+        :return: (games x colors) matrix with the most cubes of each color seen in each game
+        """
+        if len(self.draws) == 0:
+            return np.zeros((len(self.game_ids), len(self.colors)), dtype=np.int64)
+
+        # every game has at least one draw, so the offsets are strictly increasing
+        return np.maximum.reduceat(self.draws, self.draw_offsets[:-1], axis=0)
+
+def parse_draws(input: str, colors: ColorVocabulary = None) -> GameLog:
+    """
+    Parses the whole log in one regex pass.
+
+    :param colors: vocabulary to intern colors into, a new one by default
+    """
+    colors = colors or ColorVocabulary()
+    tokens = LOG_TOKEN.findall(input)
+
+    if not tokens:
+        return GameLog(
+            np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64), np.zeros((0, len(colors)), dtype=np.int64), colors
+        )
+
+    game_col, count_col, color_col, sep_col = (np.array(col) for col in zip(*tokens))
+    is_game = game_col != ''
+    is_count = count_col != ''
+
+    # a game header starts the game's first draw, a ; starts the next one. each count belongs to the
+    # most recent draw before it
+    starts_draw = is_game | (sep_col != '')
+    draw_index = np.cumsum(starts_draw)[is_count] - 1
+    num_draws = int(starts_draw.sum())
+
+    counts = count_col[is_count].astype(np.int64)
+    color_index = colors.intern_many(color_col[is_count])
+
+    draws = np.zeros((num_draws, len(colors)), dtype=np.int64)
+    np.maximum.at(draws, (draw_index, color_index), counts)
+
+    game_ids = game_col[is_game].astype(np.int64)
+    draw_offsets = np.append(np.flatnonzero(is_game[starts_draw]), num_draws)
+
+    return GameLog(game_ids, draw_offsets, draws, colors)
+
+def parse_log(input: str, colors: ColorVocabulary = None) -> Tuple[np.ndarray, np.ndarray, ColorVocabulary]:
+    """
+    :param colors: vocabulary to intern colors into, a new one by default
+    :return: game ids, a (games x colors) matrix with the most cubes of each color seen in each game,
+        and the vocabulary mapping colors to matrix columns
+    """
+    log = parse_draws(input, colors)
+    return log.game_ids, log.max_seen(), log.colors
+
+# Largest prefix-sum cube PossibleGameIndex will allocate (80 MB of int64). Logs with more distinct
+# maxima than that fall back to the offline sweep.
+MAX_CUBE_CELLS = 10_000_000
+
+class PossibleGameIndex:
+    """
+    Answers "sum of ids of games possible with at most (r, g, b) cubes" for any number of limits.
+
+    Each color's maxima are compressed to their distinct values, and game ids are accumulated into a
+    cube with one axis per color. After a prefix sum along every axis, cube[i, j, k] is the sum of ids
+    of games whose maxima are within the i-th, j-th and k-th distinct values. A query is a binary
+    search per color plus one lookup.
+
+    The cube has one cell per combination of distinct maxima, so its size is the product of the number
+    of distinct maxima of each color, not the number of games. That's small for puzzle sized counts but
+    grows quickly with large ones, so above MAX_CUBE_CELLS no cube is built and query_many answers each
+    batch with an offline sweep instead: O((games + queries) log^2 (games + queries)) per batch and
+    linear memory.
+    """
+    axes: List[np.ndarray]
+    # None when the cube would be bigger than MAX_CUBE_CELLS
+    cube: np.ndarray
+    game_ids: np.ndarray
+    max_seen: np.ndarray
+
+    def __init__(self, game_ids: np.ndarray, max_seen: np.ndarray):
+        num_colors = max_seen.shape[1]
+        self.axes = [np.unique(max_seen[:, c]) for c in range(num_colors)]
+        self.game_ids = game_ids
+        self.max_seen = max_seen
+        self.cube = None
+
+        if np.prod([len(axis) for axis in self.axes], dtype=np.float64) > MAX_CUBE_CELLS:
+            if num_colors > 3:
+                raise Exception(f'Too many distinct cube counts to index {num_colors} colors')
+            return
+
+        ranks = tuple(np.searchsorted(self.axes[c], max_seen[:, c]) for c in range(num_colors))
+        cube = np.zeros(tuple(len(axis) for axis in self.axes), dtype=np.int64)
+        np.add.at(cube, ranks, game_ids)
+
+        for axis in range(num_colors):
+            cube = np.cumsum(cube, axis=axis)
+
+        self.cube = cube
+
+    def query_many(self, limits: np.ndarray) -> np.ndarray:
+        """
+        :param limits: (queries x colors) matrix of cube limits
+        :return: sum of possible game ids for each query
+        """
+        limits = np.atleast_2d(limits)
+
+        if self.cube is None:
+            return self._sweep(limits)
+
+        ranks = [np.searchsorted(axis, limits[:, c], side='right') - 1 for c, axis in enumerate(self.axes)]
+
+        # a limit below every game's max for some color rules out all games
+        valid = np.all([r >= 0 for r in ranks], axis=0)
+
+        result = np.zeros(len(limits), dtype=np.int64)
+        result[valid] = self.cube[tuple(r[valid] for r in ranks)]
+
+        return result
+
+    def query(self, *limits: int) -> int:
+        return int(self.query_many(np.array([limits]))[0])
+
+    def _sweep(self, limits: np.ndarray) -> np.ndarray:
+        """
+        Offline 3D dominance sums. Games and queries are sorted together by red (games first on ties)
+        and split in halves recursively. Games in a left half can only be needed by queries in the right
+        half in red, so for each split those pairs are matched on green and blue by sweeping green with a
+        Fenwick tree over blue ranks.
+        """
+        # fewer than 3 colors: pad with columns every game and query passes
+        pad = 3 - self.max_seen.shape[1]
+        points = np.pad(self.max_seen, ((0, 0), (0, pad)))
+        limits = np.pad(limits, ((0, 0), (0, pad)))
+
+        # 1-based blue ranks. a game's rank is its position among the distinct blue values, a query's
+        # rank is how many of them are within its limit, so the Fenwick prefix up to it covers the games
+        blue_axis = np.unique(points[:, 2])
+        point_blue = np.searchsorted(blue_axis, points[:, 2]) + 1
+        query_blue = np.searchsorted(blue_axis, limits[:, 2], side='right')
+
+        # events: games are 0..games-1, queries are games.. in the same arrays
+        num_games = len(points)
+        red = np.concatenate((points[:, 0], limits[:, 0]))
+        green = np.concatenate((points[:, 1], limits[:, 1])).tolist()
+        blue = np.concatenate((point_blue, query_blue)).tolist()
+        is_query = np.arange(len(red)) >= num_games
+        order = np.lexsort((is_query, red)).tolist()
+
+        weights = self.game_ids.tolist()
+        tree = [0] * (len(blue_axis) + 1)
+        result = [0] * len(limits)
+
+        def solve(lo: int, hi: int):
+            if hi - lo < 2:
+                return
+
+            mid = (lo + hi) // 2
+            solve(lo, mid)
+            solve(mid, hi)
+
+            games = [e for e in order[lo:mid] if e < num_games]
+            queries = [e for e in order[mid:hi] if e >= num_games]
+
+            if not games or not queries:
+                return
+
+            # sweep green, games before queries on ties
+            events = sorted([(green[e], 0, e) for e in games] + [(green[e], 1, e) for e in queries])
+
+            for _, kind, e in events:
+                i = blue[e]
+
+                if kind == 0:
+                    while i < len(tree):
+                        tree[i] += weights[e]
+                        i += i & -i
+                else:
+                    total = 0
+                    while i > 0:
+                        total += tree[i]
+                        i -= i & -i
+                    result[e - num_games] += total
+
+            # undo this split's games so the tree is empty for the next one
+            for e in games:
+                i = blue[e]
+                while i < len(tree):
+                    tree[i] -= weights[e]
+                    i += i & -i
+
+        solve(0, len(order))
+
+        return np.array(result, dtype=np.int64)
+
+class DrawHistory:
+    """
+    Answers "minimum cube set that explains the first k draws of game g" queries. Instead of the
+    GameLog's draws it holds their running maximum within each game, so a query is a single row lookup.
+    """
+    game_ids: np.ndarray
+    # draw_offsets[g] is the first row of game g, draw_offsets[-1] is the number of draws
+    draw_offsets: np.ndarray
+    running_max: np.ndarray
+    colors: ColorVocabulary
+
+    def __init__(self, log: GameLog):
+        self.game_ids = log.game_ids
+        self.draw_offsets = log.draw_offsets
+        self.colors = log.colors
+
+        # Segmented running max: shifting each game's draws above every earlier game's lets one
+        # maximum.accumulate over all draws restart at every game boundary
+        draw_game = np.repeat(np.arange(len(self.game_ids)), np.diff(self.draw_offsets))[:, None]
+        shift = draw_game * (int(log.draws.max(initial=0)) + 1)
+        self.running_max = np.maximum.accumulate(log.draws + shift, axis=0) - shift
+
+    def num_draws(self, game: int) -> int:
+        return int(self.draw_offsets[game + 1] - self.draw_offsets[game])
+
+    def min_cubes_many(self, games: np.ndarray, draws: np.ndarray) -> np.ndarray:
+        """
+        :param games: game indexes (positions in the log, not game ids)
+        :param draws: how many of each game's draws to explain
+        :return: (queries x colors) matrix with the fewest cubes of each color needed
+        """
+        games = np.asarray(games)
+        draws = np.asarray(draws)
+
+        if np.any((draws < 0) | (draws > self.draw_offsets[games + 1] - self.draw_offsets[games])):
+            raise Exception('Draw count out of range')
+
+        result = np.zeros((len(games), len(self.colors)), dtype=np.int64)
+        nonempty = draws > 0
+        result[nonempty] = self.running_max[self.draw_offsets[games[nonempty]] + draws[nonempty] - 1]
+
+        return result
+
+    def min_cubes(self, game: int, draws: int) -> np.ndarray:
+        return self.min_cubes_many(np.array([game]), np.array([draws]))[0]
+
+def solve(game_ids: np.ndarray, max_seen: np.ndarray, colors: ColorVocabulary) -> Tuple[int, int]:
+    """
+    :return: sum of ids of possible games, sum of powers of the minimum cube sets
+    """
+    limits = colors.limits(dict(zip(COLORS, POSSIBLE_GAME_LIMITS)))
+    possible = np.all(max_seen <= limits, axis=1)
+
+    # same as parse_game: COLORS always count towards the power, even if a game never drew them, other
+    # colors only count in the games that drew them
+    not_drawn = np.zeros(max_seen.shape, dtype=bool)
+    not_drawn[:, len(COLORS):] = max_seen[:, len(COLORS):] == 0
+    powers = np.where(not_drawn, 1, max_seen).prod(axis=1)
+
+    return int(game_ids[possible].sum()), int(powers.sum())
+
 def main():
     # Read the file
+    with open("input.txt") as f:
+        log = parse_draws(f.read())
+
+    game_ids, max_seen, colors = log.game_ids, log.max_seen(), log.colors
+
+    sum_possible, sum_powers = solve(game_ids, max_seen, colors)
+
+    print("Sum of possible games:", sum_possible)
+    print("Sum of powers:", sum_powers)
+
+    # any other limits can be passed as r,g,b arguments
+    limit_args = [arg for arg in sys.argv[1:] if ':' not in arg]
+    if limit_args:
+        # COLORS are the first columns. other colors are unconstrained so they don't need an axis
+        index = PossibleGameIndex(game_ids, max_seen[:, :len(COLORS)])
+        limits = []
+
+        for arg in limit_args:
+            limit = arg.split(',')
+
+            if len(limit) != len(COLORS) or not all(x.isdigit() for x in limit):
+                raise Exception(f'Expected limits as {",".join(COLORS)} numbers, got {arg!r}')
+
+            limits.append([int(x) for x in limit])
+
+        limits = np.array(limits)
+
+        for arg, answer in zip(limit_args, index.query_many(limits)):
+            print(f"Sum of possible games with {arg}:", answer)
+
+    # and game:k arguments ask for the cubes needed by the first k draws of a game
+    draw_args = [arg for arg in sys.argv[1:] if ':' in arg]
+    if draw_args:
+        history = DrawHistory(log)
+        game_index = {int(game_id): i for i, game_id in enumerate(history.game_ids)}
+        games, draws = [], []
+
+        for arg in draw_args:
+            game_id, _, k = arg.partition(':')
+
+            if not game_id.isdigit() or not k.isdigit() or int(game_id) not in game_index:
+                raise Exception(f'Expected game:draws with a game id from the log, got {arg!r}')
+
+            games.append(game_index[int(game_id)])
+            draws.append(int(k))
+
+        for arg, cubes in zip(draw_args, history.min_cubes_many(np.array(games), np.array(draws))):
+            print(f"Cubes needed for game {arg}:", dict(zip(history.colors.names, cubes.tolist())))
+
+def main_per_game():
+    """
+    Original line-at-a-time version
+    """
     with open("input.txt") as f:
         lines = f.readlines()
 
@@ -50,7 +435,7 @@ def main():
         game_power = 1
 
         for color, max_num in max_seen.items():
-            if not POSSILBE_GAME_FILTER[color](max_num):
+            if color in POSSILBE_GAME_FILTER and not POSSILBE_GAME_FILTER[color](max_num):
                 print(f'Game {game_num} is not possible')
                 game_possible = False
             game_power *= max_num
@@ -4,9 +4,14 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Literal, TypedDict, Optional, Callable, get_args
 import os
+import sys
 import graphviz
 from graphviz import Digraph
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.checkpoint import Checkpointer
+from common.render import render_graphviz
+
 ComponentSymbol = Literal['%', '&', '_']
 Observer = Callable[['Component', 'Component', 'Pulse'], None]
 
@@ -209,6 +214,29 @@ def generate_graphviz(components: dict[str, Component]) -> Digraph:
                 dot.edge(component.label, output.label)
 
     return dot
+def circuit_state(components: dict[str, Component]) -> dict[str, object]:
+    """
+    Snapshot of the mutable parts of the circuit (flip flop states and conjunction memory) as plain data
+    """
+    state = {}
+
+    for label, component in components.items():
+        if isinstance(component, FlipFlop):
+            state[label] = component.state.value
+        elif isinstance(component, Conjunction) and component.input_states:
+            state[label] = {k: v.value for k, v in component.input_states.items()}
+
+    return state
+
+def restore_circuit_state(components: dict[str, Component], state: dict[str, object]) -> None:
+    for label, value in state.items():
+        component = components[label]
+
+        if isinstance(component, FlipFlop):
+            component.state = Pulse(value)
+        elif isinstance(component, Conjunction):
+            component.input_states = {k: Pulse(v) for k, v in value.items()}
+
 def lcm_of_list(numbers):
     lcm = numbers[0]
     for number in numbers[1:]:
@@ -236,9 +264,10 @@ def main():
     # I verified that these repeat on a regular cadence. Then the answer is just the LCM of
     # the cycle lengths (which happen to be all prime, so this is equivalent to their product).
     #
-    # os.environ["PATH"] += os.pathsep + 'C:/Program Files/Graphviz/bin/'
-    # dot = generate_graphviz(components)
-    # dot.render('circuit_graph', format='png')
+    # pass --render to regenerate it. layout happens on a background thread while part 2 runs.
+    render_thread = None
+    if '--render' in sys.argv:
+        render_thread = render_graphviz(generate_graphviz(components), 'circuit_graph', background=True)
 
     press = 1
     first_high_signals: dict[str, int] = {}
@@ -249,10 +278,32 @@ def main():
 
     components = parse(input, output_watcher)
 
+    # pass --checkpoint to periodically save the circuit so a long run can be resumed if interrupted
+    checkpointer = None
+    if '--checkpoint' in sys.argv:
+        checkpointer = Checkpointer('part2.ckpt', 'day20-presses', input, check_every=1)
+        state = checkpointer.load()
+
+        if state:
+            press = state['press']
+            first_high_signals.update(state['first_high_signals'])
+            restore_circuit_state(components, state['circuit'])
+            print(f'resuming from checkpoint at press {press}')
+
     while len(first_high_signals) < 4:
         resolve(components, 1)
         press += 1
 
+        if checkpointer and checkpointer.due():
+            checkpointer.save({
+                'press': press,
+                'first_high_signals': first_high_signals,
+                'circuit': circuit_state(components),
+            })
+
+    if checkpointer:
+        checkpointer.clear()
+
     print('part 2')
 
     for label, press in first_high_signals.items():
@@ -260,6 +311,9 @@ def main():
 
     print('answer =', lcm_of_list(list(first_high_signals.values())))
 
+    if render_thread:
+        render_thread.join()
+
 
 if __name__ == '__main__':
     main()
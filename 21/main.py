@@ -1,15 +1,21 @@
 import hashlib
 import json
 import math
+import os
 import pickle
 import sys
 from collections import deque
 from collections import defaultdict
 from dataclasses import dataclass
+from multiprocessing import Pool
 from typing import Literal, cast, Optional, Iterable, Deque
 
 from termcolor import colored
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.render import render_grid, write_once
+from common.shm import SharedGrid, SharedGridHandle, attach_grid
+
 EXAMPLE1 = ("""
 ...........
 .....###.#.
@@ -40,6 +46,22 @@ def parse(input: str) -> tuple[Grid, Point]:
 
     return grid, start_point
 
+def render_cell_counts(cell_counts: dict[int, dict[int, int]], highlight: list[int]) -> str:
+    """
+    Draws the number of reachable positions in each copy of the grid (see expand_infinite_grid_state),
+    with values in highlight colored red.
+    """
+    rows = [[cell_counts[x][y] for y in sorted(cell_counts[x].keys())] for x in sorted(cell_counts.keys())]
+
+    def render_cell(c: int) -> str:
+        st = ("" if c == 0 else str(c)).center(10)
+        return '|' + (colored(st, 'red') if c in highlight else st)
+
+    def row_suffix(i: int) -> str:
+        return f'|  {sum(rows[i])}\n' + '-' * (10 * (len(rows[i]) + 1))
+
+    return render_grid(rows, render_cell, row_suffix)
+
 def solve1(input: str, steps: int, *, starts: list[Point] = None, infinite: bool = False, verbose: bool = False) -> tuple[int, dict[int, dict[int, int]]]:
     grid, _start = parse(input)
 
@@ -142,18 +164,8 @@ def solve1(input: str, steps: int, *, starts: list[Point] = None, infinite: bool
             cell_counts[i // len(grid)][j // len(grid[0])] += 1 if steps in reachable[(i, j)] else 0
 
     log("cell counts:", cell_counts)
-    for x in sorted(cell_counts.keys()):
-        log('|', end='')
-        total = 0
-        for y in sorted(cell_counts[x].keys()):
-            c = cell_counts[x][y]
-            s = ("" if c == 0 else str(c)).center(10)
-            s = colored(s, 'red') if c in [39, 42] else s
-            total += c
-
-            log(f'{s}|', end='')
-        log(' ', total)
-        log('-' * (10 * (len(cell_counts[x]) + 1)))
+    if verbose:
+        write_once(render_cell_counts(cell_counts, [39, 42]))
 
     return sum(1 for point, distances in reachable.items() if steps in distances), cell_counts
 
@@ -225,6 +237,28 @@ def all_points_shortest_path(grid: Grid, start: Point) -> dict[Point, int]:
 
     return shortest_distance
 
+# Set in each worker process by init_shortest_path_worker
+WORKER_GRID: Optional[Grid] = None
+
+def init_shortest_path_worker(handle: SharedGridHandle):
+    global WORKER_GRID
+    WORKER_GRID = attach_grid(handle)
+
+def worker_shortest_path(start: Point) -> tuple[Point, dict[Point, int]]:
+    return start, all_points_shortest_path(WORKER_GRID, start)
+
+def all_points_shortest_paths(grid: Grid, starts: list[Point], workers: int = 0) -> dict[Point, dict[Point, int]]:
+    """
+    Runs all_points_shortest_path from each start point. With workers > 1 the BFS runs are fanned out to
+    a process pool, with the grid shared through shared memory rather than pickled into every task.
+    """
+    if workers <= 1:
+        return {start: all_points_shortest_path(grid, start) for start in starts}
+
+    with SharedGrid(grid) as shared:
+        with Pool(workers, initializer=init_shortest_path_worker, initargs=(shared.handle,)) as pool:
+            return dict(pool.imap_unordered(worker_shortest_path, starts))
+
 @dataclass
 class GridStats:
     # number of blank cells reachable from the start point after N steps. this will be filled out for every
@@ -338,7 +372,7 @@ def compute_grid_states(input: str, compute_values: list[int]) -> tuple[dict[int
     return states, cycle_values
 
 
-def compute_grid_stats(input: str) -> GridStats:
+def compute_grid_stats(input: str, workers: int = 0) -> GridStats:
     """
     I ended up not using this, but it was useful for learning
 
@@ -405,9 +439,11 @@ def compute_grid_stats(input: str) -> GridStats:
         'bottom': bottom_edges
     }
 
+    # BFS from every edge point up front. these are independent, so they can run in parallel
+    edge_distances = all_points_shortest_paths(grid, list(dict.fromkeys(p for edge in edges.values() for p in edge)), workers)
+
     # print all edge lengths
     print("--- edge lengths stats ---")
-    edge_distances = {}
     for edge_name, edge in edges.items():
         edge_lengths = [shortest_distance[point] for point in edge]
         print(edge_name)
@@ -420,8 +456,7 @@ def compute_grid_stats(input: str) -> GridStats:
 
         # what happens when we start at the edge?
         for point in edge:
-            distances = all_points_shortest_path(grid, point)
-            edge_distances[point] = distances
+            distances = edge_distances[point]
             d = max(distances.values())
 
             if d < min_distance:
@@ -455,12 +490,21 @@ def compute_grid_stats(input: str) -> GridStats:
         unreachable_points=unreachable_points
     )
 
-    pickle.dump(stats, open(filename, 'wb'))
+    # the step counts can hold solve1's nested defaultdicts, which can't be pickled. skip the cache then
+    # rather than crash (or leave an empty cache file behind)
+    try:
+        data = pickle.dumps(stats)
+    except (pickle.PicklingError, AttributeError):
+        return stats
+
+    with open(filename, 'wb') as f:
+        f.write(data)
+
     return stats
 
-def solve2(input: str, steps: int) -> int:
+def solve2(input: str, steps: int, workers: int = 0) -> int:
     grid, start = parse(input)
-    stats = compute_grid_stats(input)
+    stats = compute_grid_stats(input, workers)
 
     # will take this many steps to start cycling
     cycle_start = len(stats.reachable_counts) - 2
@@ -576,6 +620,13 @@ def main():
     # steps = int(sys.argv[1]) if len(sys.argv) > 1 else 50
     # print(solve2(input, steps))
 
+    # pass --stats [workers] to print the edge and corner stats from compute_grid_stats. with workers the
+    # BFS from each edge point runs in that many processes
+    if '--stats' in sys.argv:
+        i = sys.argv.index('--stats')
+        workers = int(sys.argv[i + 1]) if len(sys.argv) > i + 1 and sys.argv[i + 1].isdigit() else 0
+        compute_grid_stats(input, workers)
+
     answer, _ = solve1(input, 64)
     print("part 1 =", answer)
 
@@ -586,20 +637,10 @@ def main():
 
     equivalent_n = cycle_start + (part2_steps % cycle_length)
     states, cycle_values = compute_grid_states(input, [equivalent_n])
-    cell_counts = states[equivalent_n].grid_values
-
-    for x in sorted(cell_counts.keys()):
-        print('|', end='')
-        total = 0
-        for y in sorted(cell_counts[x].keys()):
-            c = cell_counts[x][y]
-            st = ("" if c == 0 else str(c)).center(10)
-            st = colored(st, 'red') if c in cycle_values else st
-            total += c
-
-            print(f'{st}|', end='')
-        print(' ', total)
-        print('-' * (10 * (len(cell_counts[x]) + 1)))
+
+    # pass --render to draw the reachable counts for each copy of the grid
+    if '--render' in sys.argv:
+        write_once(render_cell_counts(states[equivalent_n].grid_values, cycle_values))
 
     answer = expand_infinite_grid_state(part2_steps, cycle_start, cycle_length, cycle_values, states[equivalent_n])
     print("part 2 =", answer)
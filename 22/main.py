@@ -1,6 +1,13 @@
+import copy
+import os
+import sys
 from collections import defaultdict
 from dataclasses import dataclass
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.ints import extract_ints
+from common.watch import INPUT, Pipeline, PipelineRun, watch
+
 EXAMPLE1 = ("""
 1,0,1~1,2,1
 0,0,2~2,0,2
@@ -197,11 +204,10 @@ class Container:
 
 def parse(input: str) -> Container:
     bricks = []
-    for line in input.splitlines():
-        # lines in format: x1,y1,z1~x2,y2,z2
-        points = line.split('~')
-        p1 = tuple(int(x) for x in points[0].split(','))
-        p2 = tuple(int(x) for x in points[1].split(','))
+    # lines in format: x1,y1,z1~x2,y2,z2
+    for row in extract_ints(input).rows(6).tolist():
+        p1 = tuple(row[:3])
+        p2 = tuple(row[3:])
         bricks.append(Brick(
             label=chr(len(bricks)%26 + 65),
             x_bounds=(p1[0], p2[0]),
@@ -263,7 +269,31 @@ def solve1(container: Container) -> int:
 
     return removable
 
+def settled(container: Container) -> Container:
+    # settle2 moves bricks in place, so work on a copy to keep the parsed stack intact
+    container = copy.deepcopy(container)
+    container.settle2()
+    return container
+
+def build_pipeline() -> Pipeline:
+    return (
+        Pipeline()
+        .stage('parse', parse, INPUT)
+        .stage('settled', settled, 'parse')
+        .stage('part 1', solve1, 'settled')
+        .stage('part 2', solve2, 'settled')
+    )
+
+def report(run: PipelineRun):
+    print("part 1 =", run.values['part 1'])
+    print("part 2 =", run.values['part 2'])
+
 if __name__ == "__main__":
+    # pass --watch to keep the settled stack in memory and re-solve whenever input.txt changes
+    if '--watch' in sys.argv:
+        watch('input.txt', build_pipeline(), report)
+        sys.exit()
+
     # input_str = EXAMPLE1
     input_str = open('input.txt').read().strip()
 
@@ -1,15 +1,24 @@
 import os
 import sys
+import threading
 import time
 from contextlib import contextmanager
 from dataclasses import dataclass
 from io import StringIO
+from multiprocessing import Pool
 from typing import Literal, cast, Callable, Optional
 from collections import deque, defaultdict
 
 import graphviz
 from graphviz import Digraph
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.budget import Budget
+from common.checkpoint import Checkpointer
+from common.render import render_graphviz
+from common.shm import SharedArray, SharedArrayHandle, attach_array
+from common.watch import INPUT, Pipeline, PipelineRun, watch
+
 GridSymbol = Literal['.', '#', '>', '<', '^', 'v']
 Grid = list[list[GridSymbol]]
 Point = tuple[int, int]
@@ -45,15 +54,11 @@ class Graph:
                 self._memoized_edges[n1].append((n2, w))
         return self._memoized_edges[node]
 
-    def render_graphviz(self, path: list[Point] = None):
+    def render_graphviz(self, path: list[Point] = None, *, view: bool = False, background: bool = False) -> Optional[threading.Thread]:
         """
         Render graph as a PNG using graphviz library
-        :return:
+        :return: the render thread if background=True
         """
-
-        # add graphviz to path
-        os.environ["PATH"] += os.pathsep + 'C:/Program Files/Graphviz/bin/'
-
         dot = graphviz.Digraph(comment='Graph')
         for node in self.nodes:
             attrs = {}
@@ -74,14 +79,17 @@ class Graph:
             )
         for node1, node2, weight in self.edges:
             dot.edge(str(node1), str(node2), label=str(weight))
-        dot.render('graph', view=True, format='png')
+        return render_graphviz(dot, 'graph', view=view, background=background)
 
 
 def parse(input: str) -> Grid:
     return [cast(list[GridSymbol], list(line)) for line in input.splitlines()]
 
 
-def longest_walk_graph(graph: Graph, node: Point, goal: Point, length: int, visited: set[Point]) -> int:
+def longest_walk_graph(graph: Graph, node: Point, goal: Point, length: int, visited: set[Point], budget: Optional[Budget] = None) -> int:
+    """
+    If budget runs out, the search stops exploring new branches and returns the longest walk found so far.
+    """
     if node == goal:
         return length
     elif node in visited:
@@ -93,16 +101,149 @@ def longest_walk_graph(graph: Graph, node: Point, goal: Point, length: int, visi
         return 0
 
     visited.add(node)
-    longest = max(
-        longest_walk_graph(graph, n, goal, length + w, visited)
-        for n, w in neighbors
-    )
+    longest = 0
+
+    for n, w in neighbors:
+        if budget and budget.exhausted():
+            break
+
+        longest = max(longest, longest_walk_graph(graph, n, goal, length + w, visited, budget))
+
     visited.remove(node)
 
     return longest
 
 
-def longest_walk_dfs(grid: Grid, neighbors: NeighborFunc) -> int:
+def longest_walk_resumable(graph: Graph, start: Point, goal: Point, checkpointer: Checkpointer) -> int:
+    """
+    Same search as longest_walk_graph, but with an explicit stack so the search can be saved to disk
+    periodically and picked back up where it left off.
+
+    Each stack frame is [node, path length, index of the next neighbor to try]. The nodes on the
+    stack are the current path, so they double as the visited set.
+    """
+    state = checkpointer.load()
+
+    if state:
+        stack, longest = state['stack'], state['longest']
+        print(f'resuming from checkpoint: depth {len(stack)}, longest so far {longest}')
+    else:
+        stack, longest = [[start, 0, 0]], 0
+
+    on_path = {frame[0] for frame in stack}
+
+    while stack:
+        frame = stack[-1]
+        node, length, i = frame
+        neighbors = graph.adjacent_nodes(node)
+
+        if node == goal or i >= len(neighbors):
+            if node == goal:
+                longest = max(longest, length)
+
+            stack.pop()
+            on_path.remove(node)
+        else:
+            frame[2] += 1
+            n, w = neighbors[i]
+
+            if n not in on_path:
+                stack.append([n, length + w, 0])
+                on_path.add(n)
+
+        if checkpointer.due():
+            checkpointer.save({'stack': stack, 'longest': longest})
+
+    checkpointer.clear()
+    return longest
+
+
+# Search state used by worker processes, set by init_walk_worker. The graph is flattened into CSR arrays
+# (offsets/targets/weights) that live in shared memory, and tasks only carry (node, length, visited mask).
+WORKER_OFFSETS: Optional[memoryview] = None
+WORKER_TARGETS: Optional[memoryview] = None
+WORKER_WEIGHTS: Optional[memoryview] = None
+WORKER_GOAL: int = -1
+
+
+def flatten_graph(graph: Graph) -> tuple[dict[Point, int], list[int], list[int], list[int]]:
+    index: dict[Point, int] = {}
+    for node in [*graph.nodes, *(n for e in graph.edges for n in e[:2])]:
+        index.setdefault(node, len(index))
+
+    offsets = [0]
+    targets: list[int] = []
+    weights: list[int] = []
+
+    for node in index:
+        for n, w in graph.adjacent_nodes(node):
+            targets.append(index[n])
+            weights.append(w)
+        offsets.append(len(targets))
+
+    return index, offsets, targets, weights
+
+
+def init_walk_worker(offsets: SharedArrayHandle, targets: SharedArrayHandle, weights: SharedArrayHandle, goal: int):
+    global WORKER_OFFSETS, WORKER_TARGETS, WORKER_WEIGHTS, WORKER_GOAL
+    WORKER_OFFSETS = attach_array(offsets)
+    WORKER_TARGETS = attach_array(targets)
+    WORKER_WEIGHTS = attach_array(weights)
+    WORKER_GOAL = goal
+
+
+def longest_walk_flat(node: int, length: int, visited: int) -> int:
+    if node == WORKER_GOAL:
+        return length
+
+    visited |= 1 << node
+    longest = 0
+
+    for k in range(WORKER_OFFSETS[node], WORKER_OFFSETS[node + 1]):
+        n = WORKER_TARGETS[k]
+        if not (visited >> n) & 1:
+            longest = max(longest, longest_walk_flat(n, length + WORKER_WEIGHTS[k], visited))
+
+    return longest
+
+
+def longest_walk_task(task: tuple[int, int, int]) -> int:
+    return longest_walk_flat(*task)
+
+
+def longest_walk_parallel(graph: Graph, start: Point, goal: Point, workers: int) -> int:
+    """
+    Same result as longest_walk_graph, but expands the first few levels of the search to get enough
+    independent branches and then searches each branch in a worker process.
+    """
+    index, offsets, targets, weights = flatten_graph(graph)
+    goal_i = index[goal]
+
+    longest = 0
+    frontier = [(index[start], 0, 0)]
+
+    while 0 < len(frontier) < workers * 8:
+        next_frontier = []
+
+        for node, length, visited in frontier:
+            if node == goal_i:
+                longest = max(longest, length)
+                continue
+
+            visited |= 1 << node
+
+            for k in range(offsets[node], offsets[node + 1]):
+                if not (visited >> targets[k]) & 1:
+                    next_frontier.append((targets[k], length + weights[k], visited))
+
+        frontier = next_frontier
+
+    with SharedArray('q', offsets) as o, SharedArray('q', targets) as t, SharedArray('q', weights) as w:
+        with Pool(workers, initializer=init_walk_worker, initargs=(o.handle, t.handle, w.handle, goal_i)) as pool:
+            return max([longest, *pool.imap_unordered(longest_walk_task, frontier)])
+
+
+def longest_walk_dfs(grid: Grid, neighbors: NeighborFunc, budget: Optional[Budget] = None) -> int:
     start: Point = (0, 1)
     goal: Point = (len(grid) - 1, len(grid[0]) - 2)
 
@@ -111,6 +252,10 @@ def longest_walk_dfs(grid: Grid, neighbors: NeighborFunc) -> int:
     longest = 0
 
     while len(stack) > 0:
+        if budget and budget.exhausted():
+            budget.progress['open_branches'] = len(stack)
+            break
+
         point, visited = stack.pop()
 
         for next_point in sorted(neighbors(grid, point), key=lambda p: abs(p[0] - goal[0]) + abs(p[1] - goal[1])):
@@ -226,21 +371,75 @@ def timed(label: str):
     end = time.perf_counter()
     print(f'{label}: {end - start:.2f}s')
 
+def junction_graph(grid: Grid) -> Graph:
+    return build_graph(grid, (0, 1), (len(grid) - 1, len(grid[0]) - 2), part2_neighbors)
+
+def solve2_graph(graph: Graph) -> int:
+    return longest_walk_graph(graph, graph.start, graph.goal, 0, set())
+
+def build_pipeline() -> Pipeline:
+    return (
+        Pipeline()
+        .stage('parse', parse, INPUT)
+        .stage('part 1', solve1, 'parse')
+        .stage('junction graph', junction_graph, 'parse')
+        .stage('part 2', solve2_graph, 'junction graph')
+    )
+
+def report(run: PipelineRun):
+    print("part 1 =", run.values['part 1'])
+    print("part 2 =", run.values['part 2'])
+
 def main():
+    # pass --watch to keep the junction graph in memory and re-solve whenever input.txt changes
+    if '--watch' in sys.argv:
+        watch('input.txt', build_pipeline(), report)
+        return
+
     # grid = parse(open('example2.txt').read())
-    grid = parse(open('input.txt').read())
+    input = open('input.txt').read()
+    grid = parse(input)
 
     start = (0, 1)
     goal = (len(grid) - 1, len(grid[0]) - 2)
 
+    # pass --budget SECONDS to cap each search. when the budget runs out (or on Ctrl+C) the best walk found
+    # so far is printed instead
+    budget_seconds = None
+    if '--budget' in sys.argv:
+        budget_seconds = float(sys.argv[sys.argv.index('--budget') + 1])
+
     with timed('part 1'):
-        print(longest_walk_dfs(grid, part1_neighbors))
+        budget = Budget(budget_seconds)
+        with budget.cancel_on_interrupt():
+            longest = longest_walk_dfs(grid, part1_neighbors, budget)
+        print(budget.result(longest))
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 0
+    render_thread = None
 
     with timed('part 2') as checkpoint:
         part2_graph = build_graph(grid, start, goal, part2_neighbors)
         checkpoint("built graph")
-        print(longest_walk_graph(part2_graph, start, goal, 0, set()))
+
+        # pass --render to draw the junction graph. layout runs in the background during the search
+        if '--render' in sys.argv:
+            render_thread = part2_graph.render_graphviz(view=True, background=True)
+
+        if workers > 1:
+            print(longest_walk_parallel(part2_graph, start, goal, workers))
+        elif '--checkpoint' in sys.argv:
+            # pass --checkpoint to periodically save the search so it can be resumed if interrupted
+            checkpointer = Checkpointer('part2.ckpt', 'day23-walk', input)
+            print(longest_walk_resumable(part2_graph, start, goal, checkpointer))
+        else:
+            budget = Budget(budget_seconds)
+            with budget.cancel_on_interrupt():
+                longest = longest_walk_graph(part2_graph, start, goal, 0, set(), budget)
+            print(budget.result(longest))
+
+    if render_thread:
+        render_thread.join()
 
 if __name__ == '__main__':
     main()
-
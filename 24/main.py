@@ -1,5 +1,11 @@
+import os
+import sys
+
 import sympy
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.ints import extract_ints
+
 Point = tuple[int, int, int]
 Velocity = Point
 
@@ -25,15 +31,7 @@ def parse(input: str) -> list[tuple[Point, Velocity]]:
     # ex: 19, 13, 30 @ -2,  1, -2
     # in the format of: x, y, z @ vx, vy, vz
 
-    a = []
-    for line in input.splitlines():
-        p = line.split('@')[0].strip()
-        v = line.split('@')[1].strip()
-        p = tuple(map(int, p.split(',')))
-        v = tuple(map(int, v.split(',')))
-        a.append((p, v))
-
-    return a
+    return [(tuple(row[:3]), tuple(row[3:])) for row in extract_ints(input.strip()).rows(6).tolist()]
 
 values = parse(open('example.txt').read())
 test_x = (7, 27)
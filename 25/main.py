@@ -1,18 +1,24 @@
 import os
 import random
+import sys
+import threading
 from collections import defaultdict, deque
 from typing import Optional
 import networkx
 
 import graphviz
 
-def render(graph: networkx.Graph, name: str):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.budget import Budget
+from common.render import render_graphviz
+
+def render(graph: networkx.Graph, name: str, *, view: bool = True, background: bool = False) -> Optional[threading.Thread]:
     dot = graphviz.Graph()
     for node in graph.nodes:
         dot.node(node)
     for edge in graph.edges:
         dot.edge(*edge)
-    dot.render(name, view=True, format='png')
+    return render_graphviz(dot, name, view=view, background=background)
 
 def parse(input: str) -> networkx.DiGraph:
     graph = networkx.DiGraph()
@@ -22,14 +28,21 @@ def parse(input: str) -> networkx.DiGraph:
             graph.add_edge(node, edge, capacity=1)
     return graph
 
-def part1(input: str) -> list[set[str]]:
+def part1(input: str, budget: Optional[Budget] = None) -> list[set[str]]:
+    """
+    If budget runs out, nodes not yet assigned are left out of both components.
+    """
     graph = parse(input)
     graph = graph.to_undirected()
 
     start = list(graph.nodes)[0]
     components = [{start}, set()]
 
-    for n in graph.nodes:
+    for i, n in enumerate(graph.nodes):
+        if budget and budget.exhausted():
+            budget.progress['assigned'] = f'{i}/{len(graph.nodes)}'
+            break
+
         if n != start:
             for c in components:
                 if all([e in c for e in graph.neighbors(n)]):
@@ -48,6 +61,11 @@ def part1(input: str) -> list[set[str]]:
 
 if __name__ == '__main__':
     with open('input.txt') as input_file:
-        components = part1(input_file.read())
+        # pass --budget SECONDS to stop the max flow loop early and report the partial partition
+        budget = Budget(float(sys.argv[sys.argv.index('--budget') + 1]) if '--budget' in sys.argv else None, check_every=1)
+
+        with budget.cancel_on_interrupt():
+            components = part1(input_file.read(), budget)
+
         print([len(c) for c in components])
-        print(len(components[0]) * len(components[1]))
+        print(budget.result(len(components[0]) * len(components[1])))
@@ -1,4 +1,15 @@
-from typing import List, Union, Tuple
+import os
+import re
+import sys
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Set, Union, Tuple
+
+import numpy as np
+
+NUMBER = re.compile(r'\d+')
+SYMBOL = re.compile(r'[^\d.]')
 
 
 class SchematicNumber:
@@ -75,7 +86,540 @@ def process_schematic(matrix: List[List[str]]) -> Tuple[List[List[str]], List[Tu
 
     return result, symbol_positions, all_numbers
 
+def find_adjacent_numbers(schematic: List[List[Union[str, SchematicNumber]]], row: int, col: int) -> Set[SchematicNumber]:
+    """
+    :return: the distinct numbers in the 8 cells around (row, col)
+    """
+    adjacent_numbers = set()
+
+    for rowN in [-1, 0, 1]:
+        for colN in [-1, 0, 1]:
+            if rowN == 0 and colN == 0:
+                continue
+
+            if row + rowN < 0 or row + rowN >= len(schematic):
+                continue
+
+            if col + colN < 0 or col + colN >= len(schematic[row + rowN]):
+                continue
+
+            if isinstance(schematic[row + rowN][col + colN], SchematicNumber):
+                adjacent_numbers.add(schematic[row + rowN][col + colN])
+
+    return adjacent_numbers
+
+
+def process_band(lines: List[str], first_owned: int, end_owned: int) -> Tuple[int, int]:
+    """
+    Solves one band of rows in a worker process. lines holds the band's own rows [first_owned, end_owned)
+    plus a halo row on either side where there is one, so symbols just outside the band are still seen.
+
+    Numbers and stars in a halo row belong to the neighboring band and are only used for adjacency here.
+    Each number and star is owned by exactly one band, so the band totals can simply be added up.
+
+    :return: sum of the band's part numbers, sum of its gear ratios
+    """
+    schematic, symbol_positions, _ = process_schematic(parse_schematic('\n'.join(lines)))
+    sum_ratios = 0
+
+    for row, col in symbol_positions:
+        adjacent_numbers = find_adjacent_numbers(schematic, row, col)
+
+        for number in adjacent_numbers:
+            number.mark_symbol_adjacent()
+
+        if first_owned <= row < end_owned and schematic[row][col] == '*' and len(adjacent_numbers) == 2:
+            g1, g2 = adjacent_numbers
+            sum_ratios += g1.n * g2.n
+
+    owned_numbers = {
+        cell for row in schematic[first_owned:end_owned] for cell in row if isinstance(cell, SchematicNumber)
+    }
+    sum_adjacent = sum(number.n for number in owned_numbers if number.symbol_adjacent)
+
+    return sum_adjacent, sum_ratios
+
+
+def solve_banded(input: str, workers: int = None) -> Tuple[int, int]:
+    """
+    Splits the rows into bands and solves each one with process_band in a separate process.
+
+    :return: sum of part numbers, sum of gear ratios
+    """
+    lines = input.split('\n')
+    workers = workers or os.cpu_count()
+
+    # bands have equal row counts but not equal work: rows dense with numbers and symbols take longer,
+    # so cut 4 bands per worker and let the pool hand them out as workers free up
+    band_rows = max(1, -(-len(lines) // (workers * 4)))
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = []
+
+        for start in range(0, len(lines), band_rows):
+            end = min(start + band_rows, len(lines))
+            halo_start = max(start - 1, 0)
+            band = lines[halo_start:end + 1]
+
+            futures.append(pool.submit(process_band, band, start - halo_start, end - halo_start))
+
+        totals = [future.result() for future in futures]
+
+    return sum(parts for parts, _ in totals), sum(ratios for _, ratios in totals)
+
+
+class EditableSchematic:
+    """
+    Schematic that keeps its part number sum and gear ratio sum up to date as cells are edited.
+
+    An edit can only change the numbers within one cell of it (the run it's in may grow, shrink, split
+    or merge, and its neighbors may gain or lose their symbol), and those numbers can only change the
+    stars next to them. set_cell takes those numbers out of the totals, applies the edit, adds them back
+    and recomputes those stars.
+    """
+    chars: List[List[str]]
+    cells: List[List[Union[str, SchematicNumber]]]
+    symbol_positions: Set[Tuple[int, int]]
+    # (row, start, end) of each number, end exclusive
+    spans: Dict[SchematicNumber, Tuple[int, int, int]]
+    # ratio of every star, 0 for stars that aren't gears
+    gear_ratios: Dict[Tuple[int, int], int]
+    part_sum: int
+    gear_ratio_sum: int
+
+    def __init__(self, input: str):
+        self.chars = parse_schematic(input)
+        self.cells, symbol_positions, all_numbers = process_schematic(self.chars)
+        self.symbol_positions = set(symbol_positions)
+
+        self.spans = {}
+        for row in range(len(self.cells)):
+            for col, cell in enumerate(self.cells[row]):
+                if isinstance(cell, SchematicNumber):
+                    _, start, _ = self.spans.get(cell, (row, col, col))
+                    self.spans[cell] = (row, start, col + 1)
+
+        self.part_sum = 0
+        for number in all_numbers:
+            self._add_number(number)
+
+        self.gear_ratios = {}
+        self.gear_ratio_sum = 0
+        for row, col in symbol_positions:
+            self._update_star(row, col)
+
+    def _neighbors(self, row: int, col: int, include_center: bool = False) -> Iterator[Tuple[int, int]]:
+        for rowN in [-1, 0, 1]:
+            for colN in [-1, 0, 1]:
+                if rowN == 0 and colN == 0 and not include_center:
+                    continue
+
+                if 0 <= row + rowN < len(self.cells) and 0 <= col + colN < len(self.cells[row + rowN]):
+                    yield row + rowN, col + colN
+
+    def _numbers_near(self, row: int, col: int, include_center: bool = False) -> Set[SchematicNumber]:
+        return {
+            self.cells[r][c] for r, c in self._neighbors(row, col, include_center)
+            if isinstance(self.cells[r][c], SchematicNumber)
+        }
+
+    def _around_number(self, number: SchematicNumber) -> Set[Tuple[int, int]]:
+        row, start, end = self.spans[number]
+        return {pos for col in range(start, end) for pos in self._neighbors(row, col)}
+
+    def _add_number(self, number: SchematicNumber):
+        number.symbol_adjacent = any(pos in self.symbol_positions for pos in self._around_number(number))
+
+        if number.symbol_adjacent:
+            self.part_sum += number.n
+
+    def _remove_number(self, number: SchematicNumber):
+        if number.symbol_adjacent:
+            self.part_sum -= number.n
+
+    def _update_star(self, row: int, col: int):
+        self.gear_ratio_sum -= self.gear_ratios.pop((row, col), 0)
+
+        if self.chars[row][col] != '*':
+            return
+
+        adjacent_numbers = self._numbers_near(row, col)
+        ratio = 0
+
+        if len(adjacent_numbers) == 2:
+            g1, g2 = adjacent_numbers
+            ratio = g1.n * g2.n
+
+        self.gear_ratios[(row, col)] = ratio
+        self.gear_ratio_sum += ratio
+
+    def _rebuild_runs(self, row: int, start: int, end: int):
+        """
+        Re-splits the cells [start, end) of row into numbers. The range must not cut through a number.
+        """
+        current_digit = None
+
+        for col in range(start, end):
+            c = self.chars[row][col]
+
+            if c.isdigit():
+                if current_digit is None:
+                    current_digit = SchematicNumber(int(c))
+                    self.spans[current_digit] = (row, col, col + 1)
+                else:
+                    current_digit.add_digit(int(c))
+                    self.spans[current_digit] = (row, self.spans[current_digit][1], col + 1)
+                self.cells[row][col] = current_digit
+            else:
+                self.cells[row][col] = c
+                current_digit = None
+
+    def set_cell(self, row: int, col: int, ch: str):
+        if self.chars[row][col] == ch:
+            return
+
+        # take out the numbers the edit can affect, and note the stars next to them
+        old_numbers = self._numbers_near(row, col, include_center=True)
+        stars = {(row, col)} | {pos for number in old_numbers for pos in self._around_number(number)}
+
+        for number in old_numbers:
+            self._remove_number(number)
+
+        # the edited run, plus the runs next to it in the same row since they may merge. numbers in
+        # other rows keep their spans, they only need their adjacency rechecked
+        same_row = [number for number in old_numbers if self.spans[number][0] == row]
+        start = min([col] + [self.spans[number][1] for number in same_row])
+        end = max([col + 1] + [self.spans[number][2] for number in same_row])
+
+        for number in same_row:
+            del self.spans[number]
+
+        self.chars[row][col] = ch
+        self.symbol_positions.discard((row, col))
+        if not ch.isdigit() and ch != '.':
+            self.symbol_positions.add((row, col))
+
+        self._rebuild_runs(row, start, end)
+
+        # add the numbers back, every rebuilt run is within one cell of the edit. then recompute the
+        # stars next to the numbers from before or after the edit
+        new_numbers = self._numbers_near(row, col, include_center=True)
+        stars |= {pos for number in new_numbers for pos in self._around_number(number)}
+
+        for number in new_numbers:
+            self._add_number(number)
+        for pos in stars:
+            self._update_star(*pos)
+
+
+class StreamRow:
+    """
+    One row as seen by the streaming processor: its numbers as (start, end, value) spans sorted by
+    start, and its symbols by column.
+    """
+    starts: List[int]
+    numbers: List[Tuple[int, int, int]]
+    symbols: Dict[int, str]
+
+    def __init__(self, line: str = ''):
+        self.numbers = [(m.start(), m.end(), int(m.group())) for m in NUMBER.finditer(line)]
+        self.starts = [start for start, _, _ in self.numbers]
+        self.symbols = {m.start(): m.group() for m in SYMBOL.finditer(line)}
+
+    def numbers_touching(self, col: int) -> List[int]:
+        """
+        Values of the numbers in this row that are within one column of col
+        """
+        touching = []
+        i = bisect_right(self.starts, col + 1) - 1
+
+        # numbers don't overlap, so only the last couple starting at or before col + 1 can reach col
+        while i >= 0 and self.numbers[i][1] >= col:
+            touching.append(self.numbers[i][2])
+            i -= 1
+
+        return touching
+
+    def has_symbol_near(self, start: int, end: int) -> bool:
+        return any(col in self.symbols for col in range(start - 1, end + 1))
+
+
+def stream_schematic(lines: Iterable[str]) -> Iterator[Tuple[int, int, List[int]]]:
+    """
+    Processes the schematic a row at a time, keeping only the previous, current and next rows. Each row
+    is finished once the row after it has been read.
+
+    :return: for each row, its index, the sum of its part numbers and the ratios of its gears
+    """
+    window = deque([StreamRow()], maxlen=3)
+    row = 0
+
+    def finish_middle() -> Tuple[int, int, List[int]]:
+        above, middle, below = window
+
+        part_sum = sum(
+            value for start, end, value in middle.numbers
+            if any(r.has_symbol_near(start, end) for r in window)
+        )
+
+        gear_ratios = []
+        for col, c in middle.symbols.items():
+            if c == '*':
+                adjacent = [value for r in window for value in r.numbers_touching(col)]
+
+                if len(adjacent) == 2:
+                    gear_ratios.append(adjacent[0] * adjacent[1])
+
+        return row - 2, part_sum, gear_ratios
+
+    for line in lines:
+        window.append(StreamRow(line.rstrip('\r\n')))
+        row += 1
+
+        if len(window) == 3:
+            yield finish_middle()
+
+    # the last row has nothing below it
+    if row > 0:
+        window.append(StreamRow())
+        row += 1
+        yield finish_middle()
+
+
+def stream_totals(lines: Iterable[str]) -> Tuple[int, int]:
+    """
+    :return: sum of part numbers, sum of gear ratios
+    """
+    sum_adjacent = 0
+    sum_ratios = 0
+
+    for _, part_sum, gear_ratios in stream_schematic(lines):
+        sum_adjacent += part_sum
+        sum_ratios += sum(gear_ratios)
+
+    return sum_adjacent, sum_ratios
+
+def parse_char_grid(input: str) -> np.ndarray:
+    """
+    :return: (rows x cols) uint8 array of the schematic, short lines padded with '.'
+    """
+    lines = [line.rstrip('\r') for line in input.split('\n')]
+    width = max(len(line) for line in lines)
+    buf = ''.join(line.ljust(width, '.') for line in lines).encode('ascii')
+
+    return np.frombuffer(buf, dtype=np.uint8).reshape(len(lines), width)
+
+
+def label_number_runs(chars: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Labels each horizontal run of digits with its own id, 1 for the first number in reading order, 2
+    for the next and so on.
+
+    :return: label for every cell (0 where there's no digit), and the value of each label (values[0] is 0)
+    """
+    rows, cols = chars.shape
+    is_digit = (chars >= ord('0')) & (chars <= ord('9'))
+
+    # an extra empty column at the start of each row so runs can't carry over from the row above
+    padded = np.zeros((rows, cols + 1), dtype=bool)
+    padded[:, 1:] = is_digit
+    flat = padded.ravel()
+
+    run_start = np.diff(flat.astype(np.int8), prepend=0) == 1
+    labels = (np.cumsum(run_start) * flat).reshape(rows, cols + 1)[:, 1:]
+
+    # decode: each digit is worth digit * 10^(number of digits after it in its run)
+    cells = np.flatnonzero(labels)
+    cell_labels = labels.ravel()[cells]
+    digits = chars.ravel()[cells].astype(np.int64) - ord('0')
+
+    num_labels = int(cell_labels.max(initial=0))
+    run_ends = np.zeros(num_labels + 1, dtype=np.int64)
+    np.maximum.at(run_ends, cell_labels, cells)
+
+    values = np.zeros(num_labels + 1, dtype=np.int64)
+    np.add.at(values, cell_labels, digits * 10 ** (run_ends[cell_labels] - cells))
+
+    return labels, values
+
+
+def neighborhoods(grid: np.ndarray, positions: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """
+    :return: (positions x 9) array with the 3x3 block of grid around each position, 0 outside the grid
+    """
+    padded = np.pad(grid, 1)
+    rows, cols = positions
+
+    return np.stack([padded[rows + 1 + dr, cols + 1 + dc] for dr in (-1, 0, 1) for dc in (-1, 0, 1)], axis=1)
+
+
+def dilate(mask: np.ndarray) -> np.ndarray:
+    """
+    Grows mask by one cell in every direction, diagonals included
+    """
+    rows, cols = mask.shape
+    padded = np.pad(mask, 1)
+    grown = np.zeros_like(mask)
+
+    for dr in range(3):
+        for dc in range(3):
+            grown |= padded[dr:dr + rows, dc:dc + cols]
+
+    return grown
+
+
+class LabeledSchematic:
+    """
+    Schematic as flat arrays instead of a matrix of per-cell objects.
+
+    labels is an int32 grid: 0 for '.', -ord(c) for a symbol c, and a number id (1, 2, ... in reading
+    order) for each digit. values and symbol_adjacent are indexed by number id, with entry 0 unused.
+    """
+    labels: np.ndarray
+    values: np.ndarray
+    symbol_adjacent: np.ndarray
+
+    def __init__(self, chars: np.ndarray):
+        self._symbol_index = None
+        number_labels, self.values = label_number_runs(chars)
+
+        is_symbol = (number_labels == 0) & (chars != ord('.'))
+        self.labels = np.where(is_symbol, -chars.astype(np.int32), number_labels).astype(np.int32)
+
+        # a number is a part if any of its digits is next to a symbol
+        self.symbol_adjacent = np.zeros(len(self.values), dtype=bool)
+        self.symbol_adjacent[self.labels[dilate(is_symbol) & (self.labels > 0)]] = True
+
+    @staticmethod
+    def from_input(input: str) -> 'LabeledSchematic':
+        return LabeledSchematic(parse_char_grid(input))
+
+    def symbol_positions(self, symbol: str = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param symbol: only this symbol, or every symbol if None
+        :return: row and column arrays
+        """
+        if symbol is None:
+            return np.nonzero(self.labels < 0)
+
+        return np.nonzero(self.labels == -ord(symbol))
+
+    def part_sum(self) -> int:
+        return int(self.values[self.symbol_adjacent].sum())
+
+    def symbol_index(self) -> 'SymbolIndex':
+        if self._symbol_index is None:
+            self._symbol_index = SymbolIndex(self)
+
+        return self._symbol_index
+
+    def gear_ratio_sum(self) -> int:
+        return self.symbol_index().ratio_sum('*', 2)
+
+
+class SymbolIndex:
+    """
+    Numbers next to each symbol, computed once so any symbol / neighbor count combination can be
+    queried without going back to the grid.
+
+    Symbols are in reading order. The ids of the numbers next to symbol i are
+    neighbor_ids[neighbor_offsets[i]:neighbor_offsets[i + 1]].
+    """
+    rows: np.ndarray
+    cols: np.ndarray
+    codes: np.ndarray
+    counts: np.ndarray
+    # product of the neighboring numbers' values, 0 for symbols without any
+    products: np.ndarray
+    neighbor_offsets: np.ndarray
+    neighbor_ids: np.ndarray
+
+    def __init__(self, schematic: LabeledSchematic):
+        self.rows, self.cols = schematic.symbol_positions()
+        self.codes = -schematic.labels[self.rows, self.cols]
+
+        # distinct labels around each symbol, found by sorting its neighborhood
+        around = np.sort(neighborhoods(schematic.labels, (self.rows, self.cols)), axis=1)
+        distinct = around > 0
+        distinct[:, 1:] &= around[:, 1:] != around[:, :-1]
+
+        self.counts = distinct.sum(axis=1)
+        self.products = np.where(distinct, schematic.values[np.maximum(around, 0)], 1).prod(axis=1)
+        self.products[self.counts == 0] = 0
+        self.neighbor_offsets = np.concatenate(([0], np.cumsum(self.counts)))
+        self.neighbor_ids = around[distinct]
+
+    def _select(self, symbol: str = None, k: int = None) -> np.ndarray:
+        selected = np.ones(len(self.codes), dtype=bool)
+
+        if symbol is not None:
+            selected &= self.codes == ord(symbol)
+        if k is not None:
+            selected &= self.counts == k
+
+        return selected
+
+    def ratio_sum(self, symbol: str = None, k: int = None) -> int:
+        """
+        Sum over matching symbols of the product of their neighboring numbers.
+
+        :param symbol: only this symbol, or any symbol if None
+        :param k: only symbols with exactly this many neighboring numbers, or any number if None
+        """
+        return int(self.products[self._select(symbol, k)].sum())
+
+    def count(self, symbol: str = None, k: int = None) -> int:
+        """
+        Number of matching symbols, same parameters as ratio_sum
+        """
+        return int(self._select(symbol, k).sum())
+
+    def numbers_adjacent_to(self, symbols: Iterable[str]) -> np.ndarray:
+        """
+        :return: sorted ids of the numbers next to at least one of symbols
+        """
+        selected = np.isin(self.codes, [ord(symbol) for symbol in symbols])
+        return np.unique(self.neighbor_ids[np.repeat(selected, self.counts)])
+
+def solve_vectorized(input: str) -> Tuple[int, int]:
+    """
+    :return: sum of part numbers, sum of gear ratios
+    """
+    schematic = LabeledSchematic.from_input(input)
+    return schematic.part_sum(), schematic.gear_ratio_sum()
+
 def main():
+    # pass --stream for schematics too big to hold in memory
+    if '--stream' in sys.argv:
+        with open("input.txt") as f:
+            sum_adjacent, sum_ratios = stream_totals(f)
+
+        print(sum_adjacent)
+        print(sum_ratios)
+        return
+
+    # pass --parallel [workers] for very tall schematics
+    if '--parallel' in sys.argv:
+        i = sys.argv.index('--parallel')
+        workers = int(sys.argv[i + 1]) if len(sys.argv) > i + 1 and sys.argv[i + 1].isdigit() else None
+
+        with open("input.txt") as f:
+            sum_adjacent, sum_ratios = solve_banded(f.read(), workers)
+
+        print(sum_adjacent)
+        print(sum_ratios)
+        return
+
+    with open("input.txt") as f:
+        sum_adjacent, sum_ratios = solve_vectorized(f.read())
+
+    print(sum_adjacent)
+    print(sum_ratios)
+
+def main_per_cell():
+    """
+    Original version, one SchematicNumber per number and a Python loop over every cell
+    """
     # Read the file
     with open("input.txt") as f:
         input = parse_schematic(f.read())
@@ -87,21 +631,7 @@ def main():
         print(all_numbers)
 
         for row, col in symbol_positions:
-            adjacent_numbers = set()
-
-            for rowN in [-1, 0, 1]:
-                for colN in [-1, 0, 1]:
-                    if rowN == 0 and colN == 0:
-                        continue
-
-                    if row + rowN < 0 or row + rowN >= len(schemaic):
-                        continue
-
-                    if col + colN < 0 or col + colN >= len(schemaic[row]):
-                        continue
-
-                    if isinstance(schemaic[row + rowN][col + colN], SchematicNumber):
-                        adjacent_numbers.add(schemaic[row + rowN][col + colN])
+            adjacent_numbers = find_adjacent_numbers(schemaic, row, col)
 
             for number in adjacent_numbers:
                 number.mark_symbol_adjacent()
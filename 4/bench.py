@@ -0,0 +1,68 @@
+"""
+Compares the difference-array copy cascade against the original one on generated cards with hundreds
+of winning numbers each.
+
+python bench.py [number of cards] [winning numbers per card]
+"""
+import importlib.util
+import os
+import random
+import sys
+import time
+
+spec = importlib.util.spec_from_file_location('day4', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py'))
+day4 = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(day4)
+
+
+def generate_cards(num_cards: int, num_winning: int, rng: random.Random) -> str:
+    """
+    Cards in the puzzle format. Each card has num_winning winning numbers and twice as many numbers it
+    has, drawn from a range four times bigger, so a card matches about half its winning numbers.
+    """
+    numbers = range(num_winning * 4)
+    width = len(str(len(numbers)))
+    lines = []
+
+    for card in range(1, num_cards + 1):
+        winning = rng.sample(numbers, num_winning)
+        has = rng.sample(numbers, num_winning * 2)
+
+        lines.append(
+            f'Card {card}: ' +
+            ' '.join(str(n).rjust(width) for n in winning) + ' | ' +
+            ' '.join(str(n).rjust(width) for n in has)
+        )
+
+    return '\n'.join(lines)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    num_cards = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    num_winning = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    rng = random.Random(1)
+    _, all_winning, all_has = day4.parse_cards(generate_cards(num_cards, num_winning, rng))
+
+    match_time, all_matches = timed(day4.count_matches, all_winning, all_has)
+    all_matches = all_matches.tolist()
+
+    naive_time, naive_copies = timed(day4.count_copies_naive, all_matches)
+    diff_time, diff_copies = timed(day4.count_copies, all_matches)
+
+    assert naive_copies == diff_copies, "results differ"
+
+    print(f'{num_cards} cards x {num_winning} winning numbers, {sum(all_matches) / num_cards:.0f} matches per card')
+    print(f'  matches: {match_time:.3f}s')
+    print(f'  naive:   {naive_time:.3f}s')
+    print(f'  diff:    {diff_time:.3f}s ({naive_time / diff_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
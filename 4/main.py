@@ -5,48 +5,195 @@ will be in the form:
 in the order:
 winning_numbers | has_numbers
 """
-from typing import Tuple, List
+import os
+import sys
+from collections import deque
+from typing import Iterable, Tuple, List
 
+import numpy as np
 
-def parse_row(row: str) -> Tuple[List[int], List[int]]:
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.ints import extract_ints
+
+
+def numbers_mask(numbers: str) -> int:
+    """
+    :return: integer with bit n set for every number n in the space separated list
+    """
+    mask = 0
+
+    for n in numbers.split():
+        mask |= 1 << int(n)
+
+    return mask
+
+def parse_row_masks(row: str) -> Tuple[int, int]:
+    """
+    Parses the "winning | has" part of a card into one bitmask per side, so the number of matches is
+    (winning & has).bit_count()
+    """
     winning_numbers, has_numbers = row.split('|')
 
-    # split on multiple spaces
-    winning_numbers = winning_numbers.strip().split(' ')
-    winning_numbers = [int(n.strip()) for n in winning_numbers if len(n.strip())]
+    return numbers_mask(winning_numbers), numbers_mask(has_numbers)
 
-    has_numbers = has_numbers.strip().split(' ')
-    has_numbers = [int(n.strip()) for n in has_numbers if len(n.strip())]
+def parse_cards(input: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parses every "Card N: winning | has" line at once.
 
-    return winning_numbers, has_numbers
+    :return: card numbers, (cards x winning) matrix, (cards x has) matrix
+    """
+    input = input.strip()
 
-def main():
-    with open("input.txt") as f:
-        lines = f.readlines()
+    # every line has the same layout, so the number of winning numbers on the first line tells us
+    # where to split each row
+    first_line = input.split('\n', 1)[0]
+    num_winning = len(first_line.split(':')[1].split('|')[0].split())
+
+    rows = extract_ints(input).rows(len(extract_ints(first_line).values))
+
+    return rows[:, 0], rows[:, 1:num_winning + 1], rows[:, num_winning + 1:]
+
+# number of set bits in every byte value
+POPCOUNT_LUT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def to_bitsets(numbers: np.ndarray, num_words: int) -> np.ndarray:
+    """
+    :param numbers: (cards x n) matrix of numbers, all below 64 * num_words
+    :return: (cards x num_words) uint64 matrix with bit n % 64 of word n // 64 set for every number n
+    """
+    masks = np.zeros((len(numbers), num_words), dtype=np.uint64)
+    bits = np.left_shift(np.uint64(1), (numbers % 64).astype(np.uint64))
+    np.bitwise_or.at(masks, (np.arange(len(numbers))[:, None], numbers // 64), bits)
+
+    return masks
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """
+    :return: number of set bits in each row of a (rows x words) uint64 matrix
+    """
+    as_bytes = np.ascontiguousarray(words).view(np.uint8).reshape(len(words), -1)
+    return POPCOUNT_LUT[as_bytes].sum(axis=1, dtype=np.int64)
+
+def count_matches(all_winning: np.ndarray, all_has: np.ndarray) -> np.ndarray:
+    """
+    Number of winning numbers each card has, for every card at once. Each side of a card becomes a
+    bitset of uint64 words (a pair of them for numbers up to 127) and the matches are the set bits of
+    their intersection.
+    """
+    if len(all_winning) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if min(all_winning.min(initial=0), all_has.min(initial=0)) < 0:
+        raise Exception('Card numbers must not be negative')
+
+    largest = int(max(all_winning.max(initial=0), all_has.max(initial=0)))
+    num_words = largest // 64 + 1
+
+    return popcount(to_bitsets(all_winning, num_words) & to_bitsets(all_has, num_words))
+
+def count_copies(all_matches: List[int]) -> List[int]:
+    """
+    Copies of each card once every win has been cashed in. Card i adds its copies to each of the next
+    all_matches[i] cards. Instead of adding to each of them, it records where that run of additions
+    starts and stops in a difference array, and a running sum over the array gives how many copies
+    are being added to each card. That makes it O(cards) no matter how many matches there are.
+    """
+    num_cards = len(all_matches)
+    num_copies = [1] * num_cards
+
+    # diff[x] = change in the number of copies being added from card x on
+    diff = [0] * (num_cards + 1)
+    adding = 0
+
+    for i, num_matches in enumerate(all_matches):
+        adding += diff[i]
+        num_copies[i] += adding
+
+        end = min(i + num_matches + 1, num_cards)
+
+        if end > i + 1:
+            diff[i + 1] += num_copies[i]
+            diff[end] -= num_copies[i]
+
+    return num_copies
+
+def count_copies_naive(all_matches: List[int]) -> List[int]:
+    """
+    Original cascade, adds to every won card one by one. Kept as a baseline for bench.py.
+    """
+    num_cards = len(all_matches)
+
+    # array of 1s equal to number of cards
+    num_copies = [1 for _ in range(num_cards)]
+
+    for i, num_matches in enumerate(all_matches):
+        for x in range(i+1, min(i+num_matches+1, num_cards)):
+            num_copies[x] += num_copies[i]
+
+    return num_copies
+
+def stream_scratchcards(lines: Iterable[str]) -> Tuple[int, int]:
+    """
+    Same cascade as count_copies, but reading cards one at a time from any iterable of lines. A card only
+    adds copies to the next few cards, so only the difference array entries for those are kept, in a
+    deque that's never longer than the most matches on one card plus one.
+
+    :return: total score, total number of scratchcards
+    """
+    # pending[j] = change in the number of copies being added, j + 1 cards after the current one
+    pending = deque()
+    adding = 0
 
     total_score = 0
     total_scratchers = 0
 
-    # array of 1s equal to length of lines
-    num_copies = [1 for _ in range(len(lines))]
+    for line in lines:
+        if not line.strip():
+            continue
 
-    for i in range(len(lines)):
-        line = lines[i]
+        winning, has = parse_row_masks(line.split(':', 1)[1])
+        num_matches = (winning & has).bit_count()
 
-        # split out "Card N: ..."
-        card_id, line = line.split(':')
-        card_num = int(card_id.split(' ')[-1].strip())
+        if pending:
+            adding += pending.popleft()
 
-        winning, has = parse_row(line.strip())
-        num_matches = len(set(has).intersection(set(winning)))
+        copies = 1 + adding
+        total_scratchers += copies
 
         # score is 2^(n-1)
         if num_matches > 0:
             total_score += 2 ** (num_matches - 1)
 
-            for x in range(i+1, min(i+num_matches+1, len(lines))):
-                num_copies[x] += num_copies[i]
+            pending.extend([0] * (num_matches + 1 - len(pending)))
+            pending[0] += copies
+            pending[num_matches] -= copies
+
+    return total_score, total_scratchers
+
+def main():
+    # pass --stream to read the cards one line at a time
+    if '--stream' in sys.argv:
+        with open("input.txt") as f:
+            total_score, total_scratchers = stream_scratchcards(f)
+
+        print("Total score:", total_score)
+        print(total_scratchers)
+        return
+
+    with open("input.txt") as f:
+        card_nums, all_winning, all_has = parse_cards(f.read())
+
+    total_score = 0
+    total_scratchers = 0
+
+    all_matches = count_matches(all_winning, all_has).tolist()
+
+    for num_matches in all_matches:
+        # score is 2^(n-1)
+        if num_matches > 0:
+            total_score += 2 ** (num_matches - 1)
 
+    num_copies = count_copies(all_matches)
 
     print("Total score:", total_score)
     print(num_copies)
@@ -1,6 +1,12 @@
+import os
 import re
+import sys
 from typing import List, Dict, TypedDict, Tuple, Optional
-from range import RangeMapping, RangeLookupTable, SeedIterator
+from range import RangeMapping, RangeLookupTable
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.ints import extract_ints
+from common.watch import INPUT, Pipeline, PipelineRun, watch
 
 
 """
@@ -11,73 +17,85 @@ dest_start src_start range_len
 def parse_map(input_lines: List[str], title: str, parent: RangeLookupTable = None) -> RangeLookupTable:
     result = []
 
-    for line in input_lines:
-        dest_start, src_start, range_len = line.split(' ')
-        dest_start = int(dest_start)
-        src_start = int(src_start)
-        range_len = int(range_len)
-
+    for dest_start, src_start, range_len in extract_ints('\n'.join(input_lines)).rows(3).tolist():
         result.append(RangeMapping(dest_start=dest_start, src_start=src_start, range_len=range_len))
 
     return RangeLookupTable(result, title=title, parent=parent)
 
 
-def main():
-    with open("input.txt") as f:
-        # First line is the list of seeds in the form "seeds: 1 2 3 4 5"
-        raw_seeds = [int(x) for x in f.readline().split(' ')[1:]]
-        seeds = SeedIterator(raw_seeds)
+def parse_seeds(line: str) -> List[int]:
+    # in the form "seeds: 1 2 3 4 5"
+    return extract_ints(line).values.tolist()
+
+
+def parse_lookup_tables(input: str) -> List[RangeLookupTable]:
+    """
+    Parses consecutive "X-to-Y map:" blocks into a chain of lookup tables, each one parented to the
+    previous one.
+    """
+    lookup_tables = []
+
+    for block in input.strip().split('\n\n'):
+        label, *lines = block.strip().split('\n')
+        matches = re.match(r'([a-z]+)-to-([a-z]+) map:', label)
 
-        # Expect a blank line
-        f.readline()
+        if not matches:
+            raise Exception("Invalid input: expected label, line was: {}".format(label))
 
-        # expect lookup tables to be consecutive
-        lookup_tables = []
+        lut = parse_map(
+            [line.strip() for line in lines],
+            "{}->{}".format(matches.group(1), matches.group(2)),
+            None if len(lookup_tables) == 0 else lookup_tables[-1]
+        )
+        lookup_tables.append(lut)
 
-        while True:
-            line = f.readline()
+    return lookup_tables
 
-            if not line:
-                break
 
-            # Expect first line in block to be a label of the form X-to-Y map
-            # (extract X and Y via regex)
-            matches = re.match(r'([a-z]+)-to-([a-z]+) map:', line)
+def lookup_location(lookup_tables: List[RangeLookupTable], seed: int) -> int:
+    value = seed
 
-            if not matches:
-                raise Exception("Invalid input: expected label, line was: {}".format(line))
+    for lut in lookup_tables:
+        mapped = lut[value]
+        value = value if mapped is None else mapped
 
-            source_label = matches.group(1)
-            dest_label = matches.group(2)
+    return value
 
-            # Read until blank line
-            buffer = []
 
-            while True:
-                line = f.readline()
+def lowest_location(seeds: List[int], lookup_tables: List[RangeLookupTable]) -> int:
+    return min(lookup_location(lookup_tables, seed) for seed in seeds)
 
-                if not line or line == '\n':
-                    break
 
-                buffer.append(line.strip())
+def build_pipeline() -> Pipeline:
+    return (
+        Pipeline()
+        .stage('seeds text', lambda input: input.split('\n', 1)[0], INPUT)
+        .stage('maps text', lambda input: input.split('\n', 1)[1], INPUT)
+        .stage('seeds', parse_seeds, 'seeds text')
+        .stage('map chain', parse_lookup_tables, 'maps text')
+        .stage('part 1', lowest_location, 'seeds', 'map chain')
+    )
+
+
+def report(run: PipelineRun):
+    print("part 1 =", run.values['part 1'])
+
+
+def main():
+    # pass --watch to keep the map chain in memory and re-solve whenever input.txt changes. editing only
+    # the seeds line won't re-parse the maps.
+    if '--watch' in sys.argv:
+        watch('input.txt', build_pipeline(), report)
+        return
+
+    with open("input.txt") as f:
+        # First line is the list of seeds in the form "seeds: 1 2 3 4 5", then the map blocks
+        seeds_line, maps = f.read().split('\n', 1)
 
-            # Parse the map
-            print("buffer for {}-to-{}:".format(source_label, dest_label))
-            lut = parse_map(buffer, "{}->{}".format(source_label, dest_label), None if len(lookup_tables) == 0 else lookup_tables[-1])
-            lookup_tables.append(lut)
+    seeds = parse_seeds(seeds_line)
+    lookup_tables = parse_lookup_tables(maps)
 
-        # Find smallest location that has a seed
-        # i = 0
-        # while True:
-        #     val = lookup_tables[-1].reverse_lookup(i)
-        #     has_seed = seeds.includes(val)
-        #
-        #     if has_seed:
-        #         print("works: {}".format(i))
-        #         break
-        #     else:
-        #         i += 1
-        print(lookup_tables[-1].reverse_lookup_range(0, 10000))
+    print("part 1 =", lowest_location(seeds, lookup_tables))
 
 
 if __name__ == "__main__":
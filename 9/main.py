@@ -1,5 +1,10 @@
+import os
+import sys
 from typing import List, Tuple
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.ints import extract_ints
+
 EXAMPLE = """
 0 3 6 9 12 15
 1 3 6 10 15 21
@@ -20,7 +25,7 @@ def extend_sequence(sequence: List[int]) -> Tuple[int, int]:
     return sequence[0] - prev_diff, sequence[-1] + next_diff
 
 def solve_sequences(sequences: str) -> List[int]:
-    sequences = [list(map(int, line.split())) for line in sequences.split('\n') if line]
+    sequences = [line.tolist() for line in extract_ints(sequences).lines() if len(line)]
     next_values = [extend_sequence(sequence) for sequence in sequences]
 
     print(next_values)
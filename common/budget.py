@@ -0,0 +1,104 @@
+"""
+Cooperative time budgets for searches that can run unbounded on bad inputs.
+
+A Budget is a deadline plus a cancellation flag. Search loops call budget.exhausted() once per unit of
+work (it only looks at the clock every check_every calls, so it's cheap) and stop when it returns True.
+Whatever the search has found by then is wrapped up with budget.result(), which marks it as final or
+not and records how much work was done.
+
+    budget = Budget(seconds=60)
+    with budget.cancel_on_interrupt():
+        longest = longest_walk_dfs(grid, neighbors, budget)
+    print(budget.result(longest))
+"""
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Generic, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass
+class SearchResult(Generic[T]):
+    value: T
+    # False if the search was stopped early and value is only the best found so far
+    final: bool
+    stats: dict[str, Any] = field(default_factory=dict)
+    # whether str() includes stats for a final result. a stopped search always shows them
+    show_stats: bool = True
+
+    def __str__(self):
+        if self.final and not self.show_stats:
+            return str(self.value)
+
+        qualifier = '' if self.final else ' (best so far, search stopped early)'
+        stats = ', '.join(f'{k}={v}' for k, v in self.stats.items())
+        return f'{self.value}{qualifier} [{stats}]'
+
+
+class Budget:
+    def __init__(self, seconds: Optional[float] = None, check_every: int = 1024):
+        """
+        :param seconds: time limit. None means no limit (the budget can still be cancelled)
+        :param check_every: how many exhausted() calls between clock reads
+        """
+        self.started = time.monotonic()
+        self.deadline = None if seconds is None else self.started + seconds
+        self.check_every = check_every
+        self.steps = 0
+        self.stopped = False
+        self.progress: dict[str, Any] = {}
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Safe to call from another thread or a signal handler.
+        """
+        self._cancelled.set()
+
+    def exhausted(self) -> bool:
+        self.steps += 1
+
+        if self.stopped:
+            return True
+        elif self.steps % self.check_every:
+            return False
+
+        if self._cancelled.is_set() or (self.deadline is not None and time.monotonic() >= self.deadline):
+            self.stopped = True
+
+        return self.stopped
+
+    def result(self, value: T, **progress: Any) -> SearchResult[T]:
+        """
+        :param value: best answer found
+        :param progress: extra solver-specific statistics to report
+        """
+        return SearchResult(
+            value=value,
+            final=not self.stopped,
+            # without a time limit the stats are only noise unless the search was cancelled
+            show_stats=self.deadline is not None,
+            stats={
+                'steps': self.steps,
+                'elapsed': f'{time.monotonic() - self.started:.2f}s',
+                **self.progress,
+                **progress,
+            }
+        )
+
+    @contextmanager
+    def cancel_on_interrupt(self):
+        """
+        While active, Ctrl+C cancels the budget instead of raising KeyboardInterrupt, so the search
+        winds down and returns what it has.
+        """
+        previous = signal.signal(signal.SIGINT, lambda *_: self.cancel())
+
+        try:
+            yield self
+        finally:
+            signal.signal(signal.SIGINT, previous)
@@ -0,0 +1,114 @@
+"""
+Periodic checkpointing for long-running searches and simulations, so they can be resumed after being
+interrupted.
+
+On-disk format (all integers big-endian):
+
+    magic       4 bytes   b'AOCK'
+    format      u8        FORMAT_VERSION, bumped if this layout changes
+    version     u16       solver state version, chosen by the caller
+    kind_len    u8        length of kind
+    kind        bytes     utf-8 name of the solver that wrote the file (e.g. 'day23-walk')
+    fingerprint 32 bytes  sha256 of the puzzle input, so a checkpoint isn't resumed against other input
+    payload     ...       zlib-compressed pickle of the solver state
+
+Solvers should only put plain data (ints, strings, tuples, lists, dicts, sets) in their state so a
+checkpoint doesn't depend on class definitions.
+"""
+import hashlib
+import os
+import pickle
+import struct
+import time
+import zlib
+from typing import Any, Optional
+
+MAGIC = b'AOCK'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>4sBHB')
+
+
+class Checkpointer:
+    def __init__(self, path: str, kind: str, input: str, version: int = 1, interval: float = 30.0, check_every: int = 1024):
+        """
+        :param path: checkpoint file
+        :param kind: name of the solver writing the checkpoint
+        :param input: puzzle input the solver is running against
+        :param version: version of the solver's state layout. checkpoints with another version are ignored
+        :param interval: minimum seconds between saves
+        :param check_every: due() only looks at the clock once every this many calls
+        """
+        self.path = path
+        self.kind = kind
+        self.version = version
+        self.interval = interval
+        self.check_every = check_every
+        self.fingerprint = hashlib.sha256(input.encode('utf-8')).digest()
+
+        self._calls = 0
+        self._last_save = time.monotonic()
+
+    def due(self) -> bool:
+        """
+        Cheap enough to call from an inner loop.
+        """
+        self._calls += 1
+
+        if self._calls % self.check_every:
+            return False
+
+        return time.monotonic() - self._last_save >= self.interval
+
+    def save(self, state: Any):
+        kind = self.kind.encode('utf-8')
+        payload = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+        # write to a temp file and swap it in, so an interrupt mid-write can't corrupt the last checkpoint
+        tmp_path = self.path + '.tmp'
+
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.version, len(kind)))
+            f.write(kind)
+            f.write(self.fingerprint)
+            f.write(payload)
+
+        os.replace(tmp_path, self.path)
+        self._last_save = time.monotonic()
+
+    def load(self) -> Optional[Any]:
+        """
+        Returns the saved state, or None if there is no usable checkpoint for this solver and input.
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        if len(data) < HEADER.size:
+            return None
+
+        magic, format_version, version, kind_len = HEADER.unpack_from(data)
+        offset = HEADER.size
+        kind = data[offset:offset + kind_len].decode('utf-8', errors='replace')
+        offset += kind_len
+        fingerprint = data[offset:offset + 32]
+        offset += 32
+
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            print(f'ignoring checkpoint {self.path}: unrecognized format')
+            return None
+        elif kind != self.kind or version != self.version:
+            print(f'ignoring checkpoint {self.path}: written by {kind} v{version}, expected {self.kind} v{self.version}')
+            return None
+        elif fingerprint != self.fingerprint:
+            print(f'ignoring checkpoint {self.path}: written for a different input')
+            return None
+
+        return pickle.loads(zlib.decompress(data[offset:]))
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,103 @@
+"""
+Bulk integer tokenizer. Pulls every integer out of a buffer in one vectorized pass instead of splitting
+and calling int() token by token, so most parsers reduce to a reshape of the result.
+"""
+from dataclasses import dataclass
+from typing import Union
+
+import numpy as np
+
+# Any run of up to 18 digits fits in an int64. Longer runs fall back to Python ints.
+MAX_INT64_DIGITS = 18
+POW10 = 10 ** np.arange(MAX_INT64_DIGITS, dtype=np.int64)
+
+NEWLINE = ord('\n')
+MINUS = ord('-')
+
+
+@dataclass
+class IntTokens:
+    # every integer in the buffer, in order. int64, or object (Python ints) if any of them overflow
+    values: np.ndarray
+
+    # values[line_offsets[i]:line_offsets[i + 1]] are the integers on line i
+    line_offsets: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.line_offsets) - 1
+
+    def line(self, i: int) -> np.ndarray:
+        return self.values[self.line_offsets[i]:self.line_offsets[i + 1]]
+
+    def lines(self) -> list[np.ndarray]:
+        # np.split always returns at least one piece, even with no lines to split into
+        if len(self) == 0:
+            return []
+
+        return np.split(self.values, self.line_offsets[1:-1])
+
+    def rows(self, width: int) -> np.ndarray:
+        """
+        Values as a (lines, width) matrix. Every line has to hold exactly width integers.
+        """
+        counts = np.diff(self.line_offsets)
+
+        if np.any(counts != width):
+            bad = int(np.flatnonzero(counts != width)[0])
+            raise Exception(f'Expected {width} integers per line, line {bad} has {counts[bad]}')
+
+        return self.values.reshape(-1, width)
+
+
+def extract_ints(buf: Union[bytes, str], signed: bool = True) -> IntTokens:
+    """
+    Finds every run of ASCII digits in buf. With signed=True a '-' directly in front of a run makes it
+    negative, so a range like "1-3" reads as 1, -3. Pass signed=False for input like that.
+
+    :param buf: input text
+    :param signed: treat a leading '-' as a sign
+    :return:
+    """
+    if isinstance(buf, str):
+        buf = buf.encode('ascii')
+
+    data = np.frombuffer(buf, dtype=np.uint8)
+    is_digit = (data >= ord('0')) & (data <= ord('9'))
+
+    # run boundaries: a start is a digit after a non-digit, an end (exclusive) is the reverse
+    padded = np.concatenate(([False], is_digit, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+    lengths = ends - starts
+
+    if len(starts):
+        # value of each digit times its place value within its run, summed per run
+        positions = np.flatnonzero(is_digit)
+        run_of_digit = np.repeat(np.arange(len(starts)), lengths)
+        exponents = np.minimum(ends[run_of_digit] - 1 - positions, MAX_INT64_DIGITS - 1)
+        contributions = (data[positions].astype(np.int64) - ord('0')) * POW10[exponents]
+        values = np.add.reduceat(contributions, np.concatenate(([0], np.cumsum(lengths)[:-1])))
+    else:
+        values = np.zeros(0, dtype=np.int64)
+
+    negative = np.zeros(len(starts), dtype=bool)
+    if signed and len(starts):
+        has_prefix = starts > 0
+        negative[has_prefix] = data[starts[has_prefix] - 1] == MINUS
+
+    values = np.where(negative, -values, values)
+
+    overflow = np.flatnonzero(lengths > MAX_INT64_DIGITS)
+    if len(overflow):
+        values = values.astype(object)
+        for i in overflow:
+            n = int(buf[starts[i]:ends[i]])
+            values[i] = -n if negative[i] else n
+
+    # map each run to the line it's on, then turn that into offsets into values
+    newlines = np.flatnonzero(data == NEWLINE)
+    num_lines = len(newlines) + (1 if len(data) and data[-1] != NEWLINE else 0)
+    line_of_run = np.searchsorted(newlines, starts)
+    line_offsets = np.searchsorted(line_of_run, np.arange(num_lines + 1))
+
+    return IntTokens(values=values, line_offsets=line_offsets)
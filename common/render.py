@@ -0,0 +1,71 @@
+"""
+Opt-in renderers for visualizations. Solvers don't print anything per cell; instead a day builds the
+whole picture into one string and writes it out in a single call, or hands a graphviz graph to
+render_graphviz which can do the (slow) layout on a background thread.
+"""
+import os
+import sys
+import threading
+from io import StringIO
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, TypeVar
+
+if TYPE_CHECKING:
+    import graphviz
+
+T = TypeVar('T')
+
+# Where graphviz lives on the machine these were originally written on
+GRAPHVIZ_BIN = 'C:/Program Files/Graphviz/bin/'
+
+
+def render_grid(rows: Iterable[Iterable[T]], render_cell: Callable[[T], str], row_suffix: Callable[[int], str] = None) -> str:
+    """
+    Renders a grid into a single string, one line per row.
+
+    :param rows: grid rows
+    :param render_cell: maps each cell to the (possibly colored) text for it
+    :param row_suffix: optional text to append to row i, e.g. a row total
+    :return:
+    """
+    buffer = StringIO()
+
+    for i, row in enumerate(rows):
+        for cell in row:
+            buffer.write(render_cell(cell))
+        if row_suffix:
+            buffer.write(row_suffix(i))
+        buffer.write('\n')
+
+    return buffer.getvalue()
+
+
+def write_once(text: str, path: Optional[str] = None):
+    """
+    Writes a rendered visualization with a single write, either to stdout or to the given file.
+    """
+    if path is None:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def render_graphviz(dot: 'graphviz.Graph', name: str, *, view: bool = False, background: bool = False) -> Optional[threading.Thread]:
+    """
+    Renders a graphviz graph to a PNG. With background=True the render runs on a daemon thread and the
+    thread is returned so the caller can join() it before exiting if it cares about the output.
+    """
+    if GRAPHVIZ_BIN not in os.environ["PATH"]:
+        os.environ["PATH"] += os.pathsep + GRAPHVIZ_BIN
+
+    def run():
+        dot.render(name, view=view, format='png')
+
+    if not background:
+        run()
+        return None
+
+    thread = threading.Thread(target=run, name=f'render-{name}', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,145 @@
+"""
+Helpers for sharing parsed puzzle data with worker processes without pickling it into every task.
+
+The owning process copies a grid (or an integer array) into a multiprocessing.shared_memory block once.
+Tasks only carry a small handle (block name + shape), and workers attach to the block to get a view
+over the same memory.
+
+Usage:
+
+    with SharedGrid(grid) as shared:
+        with Pool(initializer=init_worker, initargs=(shared.handle,)) as pool:
+            pool.map(work, tasks)
+
+    def init_worker(handle):
+        global GRID
+        GRID = attach_grid(handle)
+"""
+from array import array
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Iterable, Optional, Sequence
+
+# Keep attached blocks alive for the lifetime of the worker. The views returned by attach_* reference
+# the block's buffer, which is invalidated if the SharedMemory object is garbage collected.
+_ATTACHED: dict[str, shared_memory.SharedMemory] = {}
+
+
+@dataclass(frozen=True)
+class SharedGridHandle:
+    name: str
+    height: int
+    width: int
+
+
+@dataclass(frozen=True)
+class SharedArrayHandle:
+    name: str
+    typecode: str
+    length: int
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if name not in _ATTACHED:
+        _ATTACHED[name] = shared_memory.SharedMemory(name=name)
+    return _ATTACHED[name]
+
+
+class _SharedBlock:
+    shm: shared_memory.SharedMemory
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class SharedGrid(_SharedBlock):
+    """
+    Owner side of a rectangular grid of single-byte characters (list[list[str]] or list[str]) placed in
+    shared memory. Rows are stored back to back, so cell (row, col) lives at offset row * width + col.
+    """
+    handle: SharedGridHandle
+
+    def __init__(self, grid: Sequence[Sequence[str]]):
+        height = len(grid)
+        width = len(grid[0]) if height else 0
+
+        # check and encode everything before creating the block, so a bad grid can't leak it
+        for i, row in enumerate(grid):
+            if len(row) != width:
+                raise Exception(f'Grid is not rectangular: row {i} has length {len(row)}, expected {width}')
+
+        data = b''.join(''.join(row).encode('ascii') for row in grid)
+
+        # SharedMemory refuses zero-sized blocks
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, height * width))
+        self.handle = SharedGridHandle(name=self.shm.name, height=height, width=width)
+        self.shm.buf[:len(data)] = data
+
+
+class SharedGridView:
+    """
+    Worker side of a SharedGrid. Supports the grid[row][col] / len(grid) / len(grid[0]) access the solvers
+    already use. Rows are decoded from the shared buffer the first time they're read and cached afterwards,
+    so the cost is paid once per worker rather than once per task.
+    """
+
+    def __init__(self, handle: SharedGridHandle):
+        self.handle = handle
+        self.buf = _attach(handle.name).buf
+        self._rows: list[Optional[str]] = [None] * handle.height
+
+    def __len__(self) -> int:
+        return self.handle.height
+
+    def __getitem__(self, row: int) -> str:
+        if row < 0:
+            row += self.handle.height
+        if not 0 <= row < self.handle.height:
+            raise IndexError(row)
+
+        cached = self._rows[row]
+
+        if cached is None:
+            w = self.handle.width
+            cached = self._rows[row] = bytes(self.buf[row * w:(row + 1) * w]).decode('ascii')
+
+        return cached
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class SharedArray(_SharedBlock):
+    """
+    Owner side of a flat array of numbers (any array module typecode) placed in shared memory. Useful
+    for adjacency lists flattened into offset/target/weight arrays.
+    """
+    handle: SharedArrayHandle
+
+    def __init__(self, typecode: str, values: Iterable[float]):
+        data = array(typecode, values)
+        nbytes = len(data) * data.itemsize
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+        self.shm.buf[:nbytes] = data.tobytes()
+        self.handle = SharedArrayHandle(name=self.shm.name, typecode=typecode, length=len(data))
+
+
+def attach_grid(handle: SharedGridHandle) -> SharedGridView:
+    return SharedGridView(handle)
+
+
+def attach_array(handle: SharedArrayHandle) -> memoryview:
+    """
+    Returns a typed memoryview over the shared block. Indexing it does not copy.
+    """
+    buf = _attach(handle.name).buf
+    itemsize = array(handle.typecode).itemsize
+    return buf[:handle.length * itemsize].cast(handle.typecode)